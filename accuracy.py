@@ -0,0 +1,293 @@
+import argparse
+import os
+import time
+from datetime import date, timedelta
+import numpy as np
+import pandas as pd
+from sqlalchemy import text, bindparam
+from db import engine, init_db, bump_data_version, writer
+import price_store
+
+# ============================
+# 애널리스트/증권사 목표가 적중률
+# ============================
+# 리포트(작성일, 목표가, 평가의견)를 일별 종가와 맞춰 보고 리포트별 결과를 report_accuracy에 저장한 뒤
+# author_accuracy / broker_accuracy에 집계합니다. (leaderboard.html)
+# - hit: 작성일부터 ACCURACY_HORIZON_DAYS일 안에 종가가 목표가에 도달 (목표가가 기준가보다 낮으면 하향 도달)
+# - signed_error: (기간 말 종가 - 목표가) / 목표가
+# - direction_correct: Buy는 상승, Sell은 하락, Hold는 ±ACCURACY_HOLD_BAND 안에서 마감하면 적중
+# 평가 기간이 끝나지 않은 리포트는 complete=0으로 저장하고 다음 실행에서 다시 계산 (집계에는 complete=1만 포함)
+# 일별 종가는 로컬 시세 저장소(price_store)에서 읽음 (실행 전에 필요한 종목만 top_up으로 증분 갱신)
+# 계산은 종목+날짜 키로 정렬한 종가 배열에 searchsorted / reduceat을 적용해 행 단위 파이썬 루프 없이 처리
+ACCURACY_HORIZON_DAYS = int(os.environ.get("ACCURACY_HORIZON_DAYS", 365))  # 평가 기간 (달력 기준 일수)
+ACCURACY_HOLD_BAND = float(os.environ.get("ACCURACY_HOLD_BAND", 0.05))  # Hold 적중으로 보는 등락률 범위
+ACCURACY_WRITE_BATCH = 50000  # writer 작업 하나에 넣는 report_accuracy 행 수
+LEADERBOARD_MIN_REPORTS = int(os.environ.get("LEADERBOARD_MIN_REPORTS", 5))  # 순위에 올리는 최소 평가 리포트 수
+
+_DAY_KEY = 100000  # 종목 순번 * _DAY_KEY + 1970-01-01 기준 일수 (일수 + 평가 기간보다 커야 함)
+
+_RESULT_COLUMNS = [
+    "report_id", "author_id", "broker_id", "horizon_days", "base_price", "end_price",
+    "hit", "signed_error", "direction_correct", "complete",
+]
+
+
+# ============================
+# 평가 대상 리포트
+# ============================
+
+def load_pending_reports(horizon_days: int, full: bool = False) -> pd.DataFrame:
+    """
+    아직 평가하지 않았거나 평가 기간이 끝나지 않은(complete=0) 리포트.
+    full=True면 목표가가 있는 전체 리포트 (평가 기간/기준 변경 시)
+    """
+    sql = """
+        SELECT r.id AS report_id, r.stock_id, s.stock_code, r.author_id, r.broker_id,
+               r.written_date, r.fair_price, r.rating_code
+        FROM reports r
+        JOIN stocks s ON s.id = r.stock_id
+        LEFT JOIN report_accuracy a ON a.report_id = r.id
+        WHERE r.fair_price > 0 AND r.written_date < :today
+    """
+    if not full:
+        sql += " AND (a.report_id IS NULL OR a.complete = 0 OR a.horizon_days != :horizon)"
+    with engine.connect() as conn:
+        reports = pd.read_sql(
+            text(sql), conn, params={"today": date.today(), "horizon": horizon_days}, parse_dates=["written_date"]
+        )
+    for column in ("author_id", "broker_id"):
+        reports[column] = reports[column].astype("Int64")
+    return reports
+
+
+# ============================
+# 벡터화 평가
+# ============================
+
+def evaluate_reports(reports: pd.DataFrame, prices: pd.DataFrame, horizon_days: int = ACCURACY_HORIZON_DAYS,
+                     hold_band: float = ACCURACY_HOLD_BAND, today: date | None = None) -> pd.DataFrame:
+    """
+    리포트별 적중 결과를 계산합니다. (_RESULT_COLUMNS 형식)
+    평가 기간 안에 거래일이 하루도 없는 리포트(시세 없음)는 결과에서 빠집니다.
+    """
+    today_day = np.datetime64(today or date.today(), "D").astype(np.int64)
+    if reports.empty or prices.empty:
+        return pd.DataFrame(columns=_RESULT_COLUMNS)
+
+    # 종목코드를 같은 순번으로 변환 (시세에 없는 종목은 -1)
+    codes = pd.Index(prices["code"].unique())
+    price_stock = codes.get_indexer(prices["code"])
+    price_day = prices["date"].to_numpy("datetime64[D]").astype(np.int64)
+    price_key = price_stock * _DAY_KEY + price_day
+    order = np.argsort(price_key, kind="stable")
+    price_key = price_key[order]
+    close = prices["close"].to_numpy(float)[order]
+
+    # 리포트를 (종목, 작성일) 키 순으로 정렬: searchsorted 조회가 순차 접근이 되고 구간 시작점도 정렬됨
+    report_stock = codes.get_indexer(reports["stock_code"])
+    written_day = reports["written_date"].to_numpy("datetime64[D]").astype(np.int64)
+    written_key = report_stock * _DAY_KEY + written_day
+    by_key = np.argsort(written_key, kind="stable")
+    reports, report_stock, written_key = reports.iloc[by_key], report_stock[by_key], written_key[by_key]
+    end_key = written_key + horizon_days
+
+    # 기준가: 작성일 이후 첫 거래일, 기간 말: 작성일 + horizon_days 이전 마지막 거래일
+    start = np.searchsorted(price_key, written_key, side="left")
+    stop = np.searchsorted(price_key, end_key, side="right")
+    valid = (report_stock >= 0) & (start < stop)
+    start, stop, end_key = start[valid], stop[valid], end_key[valid]
+    reports = reports[valid]
+    if reports.empty:
+        return pd.DataFrame(columns=_RESULT_COLUMNS)
+
+    # 구간 [start, stop) 최고/최저 종가: [start0, stop0, start1, stop1, ...]로 reduceat 후 짝수 번째만 사용
+    # (stop이 배열 끝일 수 있으므로 한 칸 덧붙임, 홀수 번째 결과는 구간 사이 값이라 버림)
+    # start가 정렬되어 있으므로 구간 사이(stop_i ~ start_i+1)는 짧고 전체 계산량은 리포트 수 * 기간 정도
+    bounds = np.empty(len(start) * 2, dtype=np.int64)
+    bounds[0::2], bounds[1::2] = start, stop
+    padded = np.append(close, close[-1])
+    high = np.maximum.reduceat(padded, bounds)[0::2]
+    low = np.minimum.reduceat(padded, bounds)[0::2]
+
+    base = close[start]
+    end = close[stop - 1]
+    fair = reports["fair_price"].to_numpy(float)
+    rating = reports["rating_code"].to_numpy(str)
+
+    hit = np.where(fair >= base, high >= fair, low <= fair)
+    change = end / base - 1
+    direction = np.select(
+        [rating == "Buy", rating == "Sell", rating == "Hold"],
+        [change > 0, change < 0, np.abs(change) <= hold_band],
+        default=np.nan,  # 평가의견 없음
+    )
+
+    return pd.DataFrame({
+        "report_id": reports["report_id"].to_numpy(),
+        "author_id": reports["author_id"].array,
+        "broker_id": reports["broker_id"].array,
+        "horizon_days": horizon_days,
+        "base_price": base,
+        "end_price": end,
+        "hit": hit.astype(int),
+        "signed_error": (end - fair) / fair,
+        "direction_correct": pd.array(direction, dtype="Float64").astype("Int64"),
+        "complete": (end_key % _DAY_KEY < today_day).astype(int),
+    })
+
+
+# ============================
+# 저장 및 집계
+# ============================
+
+_UPSERT_SQL = text(f"""
+    INSERT OR REPLACE INTO report_accuracy ({", ".join(_RESULT_COLUMNS)}, evaluated_at)
+    VALUES ({", ".join(":" + name for name in _RESULT_COLUMNS)}, CURRENT_TIMESTAMP)
+""")
+
+# 리포트 결과 → 애널리스트/증권사 통계 (complete=1만)
+_AGGREGATE_SQL = """
+    INSERT INTO {table} ({key}, report_count, hit_rate, mean_signed_error, mean_abs_error,
+                         direction_accuracy, updated_at)
+    SELECT {key}, COUNT(*), AVG(hit), AVG(signed_error), AVG(ABS(signed_error)),
+           AVG(direction_correct), CURRENT_TIMESTAMP
+    FROM report_accuracy
+    WHERE complete = 1 AND {key} IS NOT NULL
+"""
+_AGGREGATES = {"author_accuracy": "author_id", "broker_accuracy": "broker_id"}
+
+
+def _records(results: pd.DataFrame) -> list[dict]:
+    # pandas NA/NaN → None (sqlite 바인딩용)
+    return results.astype(object).where(results.notna(), None).to_dict("records")
+
+
+def _upsert_results(session, rows: list[dict], replace_all: bool = False) -> int:
+    # replace_all: 기존 결과를 같은 트랜잭션에서 지우고 씀 (전체 재평가의 첫 배치, 빈 테이블이 커밋되지 않도록)
+    if replace_all:
+        session.execute(text("DELETE FROM report_accuracy"))
+    if rows:
+        session.execute(_UPSERT_SQL, rows)
+    return len(rows)
+
+
+def refresh_accuracy_aggregates(session, author_ids: list[int] | None = None, broker_ids: list[int] | None = None):
+    """주어진 애널리스트/증권사 통계만 다시 계산 (None이면 전체)"""
+    for (table, key), ids in zip(_AGGREGATES.items(), (author_ids, broker_ids)):
+        if ids is None:
+            session.execute(text(f"DELETE FROM {table}"))
+            session.execute(text(_AGGREGATE_SQL.format(table=table, key=key) + f" GROUP BY {key}"))
+            continue
+        for i in range(0, len(ids), 500):
+            chunk = ids[i:i + 500]
+            session.execute(
+                text(f"DELETE FROM {table} WHERE {key} IN :ids").bindparams(bindparam("ids", expanding=True)),
+                {"ids": chunk},
+            )
+            session.execute(
+                text(_AGGREGATE_SQL.format(table=table, key=key) + f" AND {key} IN :ids GROUP BY {key}").bindparams(
+                    bindparam("ids", expanding=True)
+                ),
+                {"ids": chunk},
+            )
+
+
+def _finish_update(session, author_ids: list[int] | None, broker_ids: list[int] | None):
+    refresh_accuracy_aggregates(session, author_ids, broker_ids)
+    bump_data_version(session)
+
+
+def update_accuracy(horizon_days: int = ACCURACY_HORIZON_DAYS, full: bool = False, fetch: bool = True,
+                    price_loader=price_store.load_closes) -> dict:
+    """
+    새 리포트(와 평가 기간이 끝나지 않은 리포트)만 평가해 저장하고, 영향을 받은 애널리스트/증권사 통계를 갱신합니다.
+    full=True면 전체 리포트를 다시 평가하고 통계도 전부 다시 만듭니다.
+    fetch=False면 시세 저장소를 갱신하지 않고 저장된 시세만 사용합니다.
+    price_loader(codes, start, end) -> DataFrame[code, date, close] (date는 datetime64, 거래일만)
+    """
+    started = time.perf_counter()
+    reports = load_pending_reports(horizon_days, full)
+    stats = {"pending": len(reports), "evaluated": 0, "complete": 0}
+    if reports.empty:
+        print("적중률: 평가할 리포트 없음")
+        return stats
+
+    first = reports["written_date"].min().date()
+    last = min(reports["written_date"].max().date() + timedelta(days=horizon_days), date.today())
+    codes = sorted(reports["stock_code"].unique())
+    if fetch:
+        price_store.top_up(codes)
+    prices = price_loader(codes, first, last)
+    loaded = time.perf_counter()
+
+    results = evaluate_reports(reports, prices, horizon_days)
+    evaluated = time.perf_counter()
+    stats["evaluated"] = len(results)
+    stats["complete"] = int(results["complete"].sum()) if len(results) else 0
+
+    if full:
+        author_ids = broker_ids = None
+    else:
+        author_ids = [int(i) for i in results["author_id"].dropna().unique()]
+        broker_ids = [int(i) for i in results["broker_id"].dropna().unique()]
+
+    # 쓰기는 단일 writer 스레드에서 (배치마다 한 트랜잭션, 마지막에 통계 갱신)
+    # full이면 기존 행 삭제는 첫 배치와 같은 트랜잭션에서 (결과가 없어도 삭제는 실행)
+    for i in range(0, max(len(results), 1 if full else 0), ACCURACY_WRITE_BATCH):
+        writer.write(_upsert_results, _records(results.iloc[i:i + ACCURACY_WRITE_BATCH]), replace_all=full and i == 0)
+    writer.write(_finish_update, author_ids, broker_ids)
+
+    print(
+        f"적중률 갱신 완료: 대상 {stats['pending']:,}건, 평가 {stats['evaluated']:,}건 (완료 {stats['complete']:,}건) | "
+        f"시세 {loaded - started:.2f}s, 계산 {evaluated - loaded:.2f}s, 저장 {time.perf_counter() - evaluated:.2f}s"
+    )
+    return stats
+
+
+# ============================
+# 리더보드 조회
+# ============================
+
+def get_leaderboard(session, limit: int = 30, min_reports: int = LEADERBOARD_MIN_REPORTS) -> dict:
+    """적중률 상위 애널리스트/증권사 (평가 완료 리포트가 min_reports건 이상인 경우만)"""
+    authors = session.execute(text("""
+        SELECT au.name, aa.report_count, aa.hit_rate, aa.mean_signed_error, aa.mean_abs_error,
+               aa.direction_accuracy
+        FROM author_accuracy aa
+        JOIN authors au ON au.id = aa.author_id
+        WHERE aa.report_count >= :min_reports
+        ORDER BY aa.hit_rate DESC, aa.mean_abs_error
+        LIMIT :limit
+    """), {"min_reports": min_reports, "limit": limit}).mappings().all()
+    brokers = session.execute(text("""
+        SELECT b.name, ba.report_count, ba.hit_rate, ba.mean_signed_error, ba.mean_abs_error,
+               ba.direction_accuracy
+        FROM broker_accuracy ba
+        JOIN brokers b ON b.id = ba.broker_id
+        WHERE ba.report_count >= :min_reports
+        ORDER BY ba.hit_rate DESC, ba.mean_abs_error
+        LIMIT :limit
+    """), {"min_reports": min_reports, "limit": limit}).mappings().all()
+    return {"authors": authors, "brokers": brokers}
+
+
+# ============================
+# CLI
+# ============================
+
+def main():
+    parser = argparse.ArgumentParser(description="애널리스트/증권사 목표가 적중률 계산")
+    parser.add_argument("--horizon", type=int, default=ACCURACY_HORIZON_DAYS, help="평가 기간 (일)")
+    parser.add_argument("--full", action="store_true", help="전체 리포트 다시 평가")
+    parser.add_argument("--no-fetch", action="store_true", help="시세 저장소를 갱신하지 않고 저장된 시세만 사용")
+    args = parser.parse_args()
+
+    init_db()
+    try:
+        update_accuracy(args.horizon, args.full, fetch=not args.no_fetch)
+    finally:
+        writer.stop()
+
+
+if __name__ == "__main__":
+    main()
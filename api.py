@@ -0,0 +1,204 @@
+from datetime import date
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import select, tuple_
+from db import SessionLocal, Report, Stock, Broker, Author, StockSummary, normalize_rating, run_in_db_thread
+
+# ============================
+# JSON API (/api/reports, /api/stocks)
+# ============================
+# ORM 객체 대신 필요한 컬럼만 select()로 조회하고 orjson으로 직렬화 (템플릿/ORM 로딩 비용 없음)
+# fields=a,b,c 로 필요한 필드만 요청 가능, 페이지는 next_cursor로 이어서 조회
+router = APIRouter(prefix="/api", default_response_class=ORJSONResponse)
+
+API_DEFAULT_LIMIT = 100
+API_MAX_LIMIT = 1000
+
+# 필드 이름 → 컬럼
+REPORT_FIELDS = {
+    "id": Report.id,
+    "written_date": Report.written_date,
+    "title": Report.title,
+    "stock_code": Stock.stock_code,
+    "stock_name": Stock.stock_name,
+    "broker": Broker.name,
+    "author": Author.name,
+    "rating": Report.rating_code,
+    "fair_price": Report.fair_price,
+    "current_price": Report.current_price,
+    "expected_return": Report.expected_return,
+    "report_idx": Report.report_idx,
+    "attachment_url": Report.attachment_url,
+    "summary": Report.summary,
+    "novice_content": Report.novice_content,
+    "expert_content": Report.expert_content,
+}
+# fields를 지정하지 않으면 긴 본문(리뷰) 컬럼은 제외
+DEFAULT_REPORT_FIELDS = [name for name in REPORT_FIELDS if name not in ("summary", "novice_content", "expert_content")]
+
+STOCK_FIELDS = {
+    "id": Stock.id,
+    "stock_code": Stock.stock_code,
+    "stock_name": Stock.stock_name,
+    "current_price": Stock.current_price,
+    "company_info_url": Stock.company_info_url,
+    "avg_fair_price": StockSummary.avg_fair_price,
+    "avg_expected_return": StockSummary.avg_expected_return,
+    "main_rating": StockSummary.main_rating,
+    "report_count": StockSummary.report_count,
+}
+DEFAULT_STOCK_FIELDS = list(STOCK_FIELDS)
+
+
+# ============================
+# 키셋 커서 (/data.html과 같은 형식)
+# ============================
+
+def encode_cursor(written_date: date, report_id: int) -> str:
+    """(written_date, id) 키셋 커서 문자열 생성. 예: 2025-11-20_1234"""
+    return f"{written_date.isoformat()}_{report_id}"
+
+def decode_cursor(cursor: str | None):
+    """커서 문자열을 (written_date, id)로 변환. 형식이 잘못되면 None (첫 페이지)"""
+    if not cursor:
+        return None
+    try:
+        written_date, report_id = cursor.rsplit("_", 1)
+        return date.fromisoformat(written_date), int(report_id)
+    except ValueError:
+        return None
+
+
+def parse_fields(fields: str | None, available: dict, default: list[str]) -> list[str]:
+    if not fields:
+        return default
+    names = list(dict.fromkeys(name.strip() for name in fields.split(",") if name.strip()))
+    unknown = [name for name in names if name not in available]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"unknown fields: {', '.join(unknown)} (available: {', '.join(available)})",
+        )
+    return names
+
+
+def _rows_to_dicts(rows, names: list[str]) -> list[dict]:
+    # 커서용으로 추가한 컬럼은 응답에서 제외
+    return [dict(zip(names, row)) for row in rows]
+
+
+# ============================
+# /api/reports
+# ============================
+
+def _query_reports(names: list[str], filters: dict, cursor: str | None, limit: int) -> dict:
+    # 커서 계산용 컬럼(written_date, id)은 항상 뒤에 붙여서 조회
+    columns = [REPORT_FIELDS[name] for name in names] + [Report.written_date, Report.id]
+    stmt = select(*columns).select_from(Report)
+
+    # 요청 필드/필터에 필요한 테이블만 조인
+    tables = {column.table for column in columns}
+    if filters["stock_code"]:
+        tables.add(Stock.__table__)
+    if filters["broker"]:
+        tables.add(Broker.__table__)
+    if filters["author"]:
+        tables.add(Author.__table__)
+    if Stock.__table__ in tables:
+        stmt = stmt.join(Stock, Report.stock_id == Stock.id)
+    if Broker.__table__ in tables:
+        stmt = stmt.outerjoin(Broker, Report.broker_id == Broker.id)
+    if Author.__table__ in tables:
+        stmt = stmt.outerjoin(Author, Report.author_id == Author.id)
+
+    if filters["stock_code"]:
+        stmt = stmt.where(Stock.stock_code == filters["stock_code"])
+    if filters["broker"]:
+        stmt = stmt.where(Broker.name == filters["broker"])
+    if filters["author"]:
+        stmt = stmt.where(Author.name == filters["author"])
+    if filters["rating"]:
+        stmt = stmt.where(Report.rating_code == normalize_rating(filters["rating"]))
+    if filters["date_from"]:
+        stmt = stmt.where(Report.written_date >= filters["date_from"])
+    if filters["date_to"]:
+        stmt = stmt.where(Report.written_date <= filters["date_to"])
+
+    position = decode_cursor(cursor)
+    if position:
+        stmt = stmt.where(tuple_(Report.written_date, Report.id) < position)
+
+    stmt = stmt.order_by(Report.written_date.desc(), Report.id.desc()).limit(limit + 1)
+    with SessionLocal() as session:
+        rows = session.execute(stmt).all()
+
+    next_cursor = encode_cursor(*rows[limit - 1][-2:]) if len(rows) > limit else None
+    rows = rows[:limit]
+    return {"items": _rows_to_dicts(rows, names), "count": len(rows), "next_cursor": next_cursor}
+
+
+@router.get("/reports")
+async def api_reports(
+    stock_code: str | None = None,
+    broker: str | None = None,
+    author: str | None = None,
+    rating: str | None = Query(None, description="Buy / Sell / Hold / None (매수 등 원문도 허용)"),
+    date_from: date | None = None,
+    date_to: date | None = None,
+    fields: str | None = Query(None, description="쉼표로 구분한 필드 목록"),
+    cursor: str | None = None,
+    limit: int = API_DEFAULT_LIMIT,
+):
+    """리포트 목록 (최신순). 다음 페이지는 next_cursor를 cursor로 넘겨 조회"""
+    names = parse_fields(fields, REPORT_FIELDS, DEFAULT_REPORT_FIELDS)
+    filters = {
+        "stock_code": stock_code,
+        "broker": broker,
+        "author": author,
+        "rating": rating,
+        "date_from": date_from,
+        "date_to": date_to,
+    }
+    limit = max(1, min(limit, API_MAX_LIMIT))
+    return await run_in_db_thread(_query_reports, names, filters, cursor, limit)
+
+
+# ============================
+# /api/stocks
+# ============================
+
+def _query_stocks(names: list[str], stock_code: str | None, name: str | None,
+                  cursor: int | None, limit: int) -> dict:
+    columns = [STOCK_FIELDS[n] for n in names] + [Stock.id]
+    stmt = select(*columns).select_from(Stock)
+    if any(column.table is StockSummary.__table__ for column in columns):
+        stmt = stmt.outerjoin(StockSummary, StockSummary.stock_id == Stock.id)
+
+    if stock_code:
+        stmt = stmt.where(Stock.stock_code == stock_code)
+    if name:
+        stmt = stmt.where(Stock.stock_name.like(f"%{name}%"))
+    if cursor:
+        stmt = stmt.where(Stock.id > cursor)
+
+    stmt = stmt.order_by(Stock.id).limit(limit + 1)
+    with SessionLocal() as session:
+        rows = session.execute(stmt).all()
+
+    next_cursor = str(rows[limit - 1][-1]) if len(rows) > limit else None
+    rows = rows[:limit]
+    return {"items": _rows_to_dicts(rows, names), "count": len(rows), "next_cursor": next_cursor}
+
+
+@router.get("/stocks")
+async def api_stocks(
+    stock_code: str | None = None,
+    name: str | None = Query(None, description="종목명 부분 일치"),
+    fields: str | None = Query(None, description="쉼표로 구분한 필드 목록"),
+    cursor: int | None = None,
+    limit: int = API_DEFAULT_LIMIT,
+):
+    """종목 목록 (id순, 요약 통계 포함). 다음 페이지는 next_cursor를 cursor로 넘겨 조회"""
+    names = parse_fields(fields, STOCK_FIELDS, DEFAULT_STOCK_FIELDS)
+    limit = max(1, min(limit, API_MAX_LIMIT))
+    return await run_in_db_thread(_query_stocks, names, stock_code, name, cursor, limit)
@@ -0,0 +1,367 @@
+import argparse
+import contextlib
+import csv
+import html
+import io
+import json
+import os
+import platform
+import random
+import re
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from urllib.parse import parse_qs
+
+# ============================
+# 벤치마크 (합성 데이터)
+# ============================
+# python benchmark.py --reports 100000 --output bench_new.json --compare bench_old.json
+# 별도 DB 파일(--db, 기본: 임시 폴더)에 합성 데이터를 만들고 적재/검색/통계/리뷰 저장 시간을 측정해 JSON으로 저장합니다.
+# 같은 --seed, 같은 크기로 실행하면 같은 데이터가 만들어지므로 커밋 간 결과를 비교할 수 있습니다.
+
+# ============================
+# 합성 데이터 생성
+# ============================
+_STOCK_PREFIXES = ["삼성", "현대", "엘지", "에스케이", "한화", "롯데", "포스코", "두산", "신한", "한국", "대한", "코리아",
+                   "동원", "효성", "금호", "대우", "한미", "셀트", "카카오", "네이버", "한솔", "동국", "대상", "오리온"]
+_STOCK_SUFFIXES = ["전자", "화학", "바이오", "중공업", "건설", "제약", "반도체", "에너지", "금융지주", "생명", "물산", "모비스",
+                   "철강", "식품", "통신", "디스플레이", "엔진", "소재", "로직스", "홀딩스", "산업", "테크", "솔루션", "게임즈"]
+_BROKER_NAMES = ["미래에셋", "한국투자", "NH투자", "KB", "삼성", "키움", "신한투자", "하나", "대신", "메리츠", "유안타", "교보",
+                 "하이투자", "IBK투자", "DB금융투자", "한화투자", "유진투자", "SK", "현대차", "이베스트투자", "BNK투자", "상상인"]
+_SURNAMES = ["김", "이", "박", "최", "정", "강", "조", "윤", "장", "임", "한", "오", "서", "신", "권", "황", "안", "송", "전", "홍"]
+_GIVEN_SYLLABLES = ["민", "서", "지", "현", "준", "우", "예", "도", "하", "윤", "수", "영", "진", "태", "은", "성", "재", "혜",
+                    "동", "경", "승", "유", "정", "원"]
+_TITLE_WORDS = ["실적 개선 지속", "목표주가 상향", "업황 회복 기대", "수익성 점검", "신규 수주 확대", "밸류에이션 매력",
+                "하반기 성장 가속", "컨센서스 상회", "비용 부담 완화", "주주환원 강화", "턴어라운드 본격화", "단기 조정 불가피"]
+_RATINGS = ["Buy", "매수", "Strong Buy", "Hold", "중립", "Marketperform", "Sell", "Not Rated"]
+_RATING_WEIGHTS = [40, 25, 5, 10, 8, 4, 3, 5]
+
+
+def _zipf_weights(n: int, s: float = 1.1) -> list[float]:
+    # 상위 종목/증권사/애널리스트에 리포트가 몰리는 분포
+    return [1.0 / (rank ** s) for rank in range(1, n + 1)]
+
+
+def _unique_names(rng: random.Random, n: int, make) -> list[str]:
+    names = {}
+    while len(names) < n:
+        name = make(rng)
+        if name in names:
+            name = f"{name}{len(names)}"
+        names[name] = None
+    return list(names)
+
+
+def make_universe(n_stocks: int, n_brokers: int, n_authors: int, seed: int = 42) -> dict:
+    rng = random.Random(seed)
+    stock_names = _unique_names(rng, n_stocks, lambda r: r.choice(_STOCK_PREFIXES) + r.choice(_STOCK_SUFFIXES))
+    stocks = [
+        {
+            "stock_code": f"{100000 + i * 7:06d}",
+            "stock_name": name,
+            "base_price": int(round(rng.lognormvariate(10.3, 1.0), -1)) + 100,
+        }
+        for i, name in enumerate(stock_names)
+    ]
+    brokers = _unique_names(rng, n_brokers, lambda r: r.choice(_BROKER_NAMES) + "증권")
+    authors = _unique_names(
+        rng, n_authors, lambda r: r.choice(_SURNAMES) + r.choice(_GIVEN_SYLLABLES) + r.choice(_GIVEN_SYLLABLES)
+    )
+    return {"stocks": stocks, "brokers": brokers, "authors": authors}
+
+
+def generate_reports(universe: dict, n_reports: int, seed: int = 42, start_idx: int = 1_000_000,
+                     end_date: date = date(2025, 12, 31), days: int = 3 * 365):
+    """save_reports 형식의 리포트 dict를 n_reports개 생성 (종목/증권사/애널리스트는 Zipf 분포로 편중)"""
+    rng = random.Random(seed + 1)
+    stocks, brokers, authors = universe["stocks"], universe["brokers"], universe["authors"]
+    stock_weights = _zipf_weights(len(stocks))
+    broker_weights = _zipf_weights(len(brokers), 0.8)
+    author_weights = _zipf_weights(len(authors), 0.9)
+    chunk = 10_000
+    for offset in range(0, n_reports, chunk):
+        size = min(chunk, n_reports - offset)
+        picked_stocks = rng.choices(stocks, stock_weights, k=size)
+        picked_brokers = rng.choices(brokers, broker_weights, k=size)
+        picked_authors = rng.choices(authors, author_weights, k=size)
+        picked_ratings = rng.choices(_RATINGS, _RATING_WEIGHTS, k=size)
+        for i in range(size):
+            stock = picked_stocks[i]
+            current_price = int(stock["base_price"] * rng.uniform(0.8, 1.2))
+            fair_price = int(round(current_price * rng.uniform(0.9, 1.6), -2)) or None
+            report_idx = start_idx + offset + i
+            yield {
+                "written_date": (end_date - timedelta(days=int(rng.triangular(0, days, 0)))).isoformat(),
+                "stock_name": stock["stock_name"],
+                "stock_code": stock["stock_code"],
+                "title": f"{stock['stock_name']}, {rng.choice(_TITLE_WORDS)}",
+                "fair_price": fair_price,
+                "current_price": current_price,
+                "expected_return": round((fair_price / current_price - 1) * 100, 2) if fair_price else None,
+                "rating_code": picked_ratings[i],
+                "author_name": picked_authors[i],
+                "broker_name": picked_brokers[i],
+                "company_info_url": f"https://markets.hankyung.com/stock/{stock['stock_code']}",
+                "attachment_url": f"https://consensus.hankyung.com/analysis/downpdf?report_idx={report_idx}",
+            }
+
+
+def write_reports_csv(path: str, reports) -> int:
+    """load_csv_to_db가 읽는 한글 컬럼 CSV로 저장"""
+    columns = {
+        "작성일": "written_date", "종목명": "stock_name", "종목코드": "stock_code", "제목": "title",
+        "적정가격": "fair_price", "현재가격": "current_price", "기대수익률": "expected_return",
+        "평가의견": "rating_code", "작성자": "author_name", "작성기관": "broker_name",
+        "기업정보": "company_info_url", "첨부파일": "attachment_url",
+    }
+    count = 0
+    with open(path, "w", newline="", encoding="utf-8-sig") as f:
+        out = csv.writer(f)
+        out.writerow(columns)
+        for report in reports:
+            out.writerow(["" if report[key] is None else report[key] for key in columns.values()])
+            count += 1
+    return count
+
+
+# ============================
+# 측정 도구
+# ============================
+
+_NEXT_LINK_RE = re.compile(r'href="/data\.html\?([^"]*cursor=[^"]*)"')
+
+def _next_cursor(page: str) -> str | None:
+    """data.html의 Next 링크에서 cursor 값 추출"""
+    match = _NEXT_LINK_RE.search(page)
+    if not match:
+        return None
+    return parse_qs(html.unescape(match.group(1))).get("cursor", [None])[0]
+
+
+def measure(fn, repeat: int = 1, setup=None, quiet: bool = True, ops: int | None = None) -> dict:
+    """fn을 repeat번 실행한 시간(초). setup은 매 실행 전에 호출하고 시간에 포함하지 않음"""
+    runs = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        sink = io.StringIO() if quiet else None
+        with contextlib.redirect_stdout(sink) if quiet else contextlib.nullcontext():
+            started = time.perf_counter()
+            fn()
+            runs.append(time.perf_counter() - started)
+    result = {
+        "runs": [round(t, 6) for t in runs],
+        "median_s": round(statistics.median(runs), 6),
+        "min_s": round(min(runs), 6),
+    }
+    if ops:
+        result["ops"] = ops
+        result["ops_per_s"] = round(ops / statistics.median(runs), 1)
+    return result
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+# ============================
+# 벤치마크 실행
+# ============================
+
+def run_benchmarks(args) -> dict:
+    # db 모듈은 import 시점의 DB_URL로 엔진을 만들므로 반드시 먼저 지정
+    os.environ["DB_URL"] = f"sqlite:///{args.db}"
+    import db
+    from fastapi.testclient import TestClient
+    import main
+    from cache import response_cache
+
+    def reset_db():
+        db.writer.stop()
+        db.engine.dispose()
+        for suffix in ("", "-wal", "-shm"):
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(args.db + suffix)
+        with contextlib.redirect_stdout(io.StringIO()):
+            db.init_db()
+
+    universe = make_universe(args.stocks, args.brokers, args.authors, args.seed)
+    results = {}
+
+    def record(name: str, result: dict):
+        results[name] = result
+        extra = f", {result['ops_per_s']:,} ops/s" if "ops_per_s" in result else ""
+        print(f"  {name:<32} median {result['median_s'] * 1000:10.2f} ms{extra}")
+
+    print(f"DB: {args.db}")
+    print(f"데이터: 리포트 {args.reports:,} / 종목 {args.stocks:,} / 증권사 {args.brokers} / 애널리스트 {args.authors:,}")
+
+    # ---------- 적재 ----------
+    print("[적재]")
+    small = list(generate_reports(universe, min(args.reports, args.save_reports_rows), args.seed))
+    record("ingest.save_reports", measure(
+        lambda: db.save_reports(small), repeat=args.repeat, setup=reset_db, ops=len(small)
+    ))
+
+    reports = list(generate_reports(universe, args.reports, args.seed))
+    record("ingest.bulk_save_reports", measure(
+        lambda: db.bulk_save_reports(reports), repeat=args.repeat, setup=reset_db, ops=len(reports)
+    ))
+
+    csv_path = os.path.join(os.path.dirname(args.db), "bench_reports.csv")
+    write_reports_csv(csv_path, reports)
+    del reports
+    record("ingest.load_csv_to_db", measure(
+        lambda: db.load_csv_to_db(csv_path), repeat=args.repeat, setup=reset_db, ops=args.reports
+    ))
+    # 이후 측정은 마지막 load_csv_to_db 결과 DB를 사용
+
+    # ---------- 조회 (/data.html) ----------
+    print("[검색 /data.html]")
+    client = TestClient(main.app)  # lifespan(주가 업데이트 작업)은 실행하지 않음
+    top_stock = universe["stocks"][0]["stock_name"]
+    queries = {
+        "popular_stock": top_stock,
+        "rare_stock": universe["stocks"][-1]["stock_name"],
+        "broker": universe["brokers"][0],
+        "author": universe["authors"][0],
+        "short_like": top_stock[:2],  # 3글자 미만 → LIKE 검색
+        "no_match": "존재하지않는종목명",
+    }
+    for name, q in queries.items():
+        record(f"read_data.{name}", measure(
+            lambda q=q: client.get("/data.html", params={"q": q}), repeat=args.query_repeat,
+            setup=response_cache.clear, ops=1,
+        ))
+    # 깊은 페이지: 커서로 10페이지 이동
+    def deep_pages():
+        cursor = None
+        for _ in range(10):
+            response = client.get("/data.html", params={"q": top_stock, **({"cursor": cursor} if cursor else {})})
+            cursor = _next_cursor(response.text)
+            if not cursor:
+                break
+    record("read_data.deep_pages_x10", measure(deep_pages, repeat=args.query_repeat, setup=response_cache.clear, ops=10))
+    record("read_data.cached", measure(
+        lambda: client.get("/data.html", params={"q": top_stock}), repeat=args.query_repeat, ops=1
+    ))
+
+    # ---------- 통계 ----------
+    print("[통계]")
+    record("statistic.page", measure(
+        lambda: client.get("/statistic.html"), repeat=args.query_repeat, setup=response_cache.clear, ops=1
+    ))
+    record("statistic.rebuild_stock_summary", measure(db.rebuild_stock_summary, repeat=args.repeat))
+
+    def refresh_popular():
+        with db.SessionLocal() as session:
+            db.refresh_stock_summary(session, list(range(1, 101)))
+            session.commit()
+    record("statistic.refresh_100_stocks", measure(refresh_popular, repeat=args.query_repeat, ops=100))
+
+    def move_prices():
+        with db.engine.begin() as conn:
+            conn.execute(db.text("UPDATE stocks SET current_price = COALESCE(current_price, 10000) + 10 WHERE id <= 100"))
+
+    def refresh_returns():
+        with db.SessionLocal() as session:
+            db.refresh_report_returns(session, list(range(1, 101)))
+            session.commit()
+    record("statistic.refresh_report_returns_100_stocks", measure(
+        refresh_returns, repeat=args.query_repeat, setup=move_prices, ops=100
+    ))
+
+    # ---------- 리뷰 저장 ----------
+    print("[리뷰 저장]")
+    rng = random.Random(args.seed + 2)
+    review_targets = rng.sample(range(1_000_000, 1_000_000 + args.reports), min(args.reviews, args.reports))
+    reviews = [
+        {"report_idx": idx, "summary": "요약 " * 50, "novice_content": "초보자용 설명 " * 80,
+         "expert_content": "전문가용 분석 " * 120}
+        for idx in review_targets
+    ]
+    record("review.update_report_reviews", measure(
+        lambda: db.update_report_reviews(reviews), repeat=args.repeat, ops=len(reviews)
+    ))
+    singles = review_targets[:min(100, len(review_targets))]
+    record("review.update_report_review", measure(
+        lambda: [db.update_report_review(f"{idx}.pdf", "요약", "초보자", "전문가") for idx in singles],
+        repeat=args.repeat, ops=len(singles),
+    ))
+
+    db.writer.stop()
+    return results
+
+
+def compare(results: dict, baseline_path: str):
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)["results"]
+    print(f"\n[비교: {baseline_path}] (비율 < 1.0 이면 빨라짐)")
+    for name, result in results.items():
+        if name in baseline:
+            ratio = result["median_s"] / baseline[name]["median_s"] if baseline[name]["median_s"] else float("nan")
+            print(f"  {name:<32} {baseline[name]['median_s'] * 1000:10.2f} ms → {result['median_s'] * 1000:10.2f} ms"
+                  f"  x{ratio:.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="합성 데이터 벤치마크 (적재/검색/통계/리뷰 저장)")
+    parser.add_argument("--reports", type=int, default=10_000)
+    parser.add_argument("--stocks", type=int, default=2_000)
+    parser.add_argument("--brokers", type=int, default=40)
+    parser.add_argument("--authors", type=int, default=800)
+    parser.add_argument("--reviews", type=int, default=1_000, help="리뷰 일괄 저장 건수")
+    parser.add_argument("--save-reports-rows", type=int, default=5_000,
+                        help="save_reports(행 단위 ORM 경로) 측정에 쓰는 최대 행 수")
+    parser.add_argument("--repeat", type=int, default=3, help="적재/재계산 반복 횟수")
+    parser.add_argument("--query-repeat", type=int, default=20, help="조회 반복 횟수")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--db", help="벤치마크용 SQLite 파일 (기본: 임시 폴더, 실행할 때마다 삭제 후 생성)")
+    parser.add_argument("-o", "--output", help="결과 JSON 파일 (기본: bench_<시각>.json)")
+    parser.add_argument("--compare", help="비교할 이전 결과 JSON")
+    args = parser.parse_args()
+
+    tmp_dir = None
+    if not args.db:
+        tmp_dir = tempfile.TemporaryDirectory(prefix="bench_")
+        args.db = os.path.join(tmp_dir.name, "bench.db")
+    args.db = os.path.abspath(args.db)
+
+    started_at = datetime.now()
+    results = run_benchmarks(args)
+
+    report = {
+        "meta": {
+            "started_at": started_at.isoformat(timespec="seconds"),
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "params": {key: value for key, value in vars(args).items() if key not in ("output", "compare", "db")},
+        },
+        "results": results,
+    }
+    output = args.output or f"bench_{started_at:%Y%m%d_%H%M%S}.json"
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n결과 저장: {output}")
+
+    if args.compare:
+        compare(results, args.compare)
+    if tmp_dir:
+        tmp_dir.cleanup()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
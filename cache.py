@@ -0,0 +1,155 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from fastapi import Request
+from fastapi.responses import Response
+from db import get_data_version, run_in_db_thread
+from metrics import register_collector
+
+# ============================
+# 페이지 응답 캐시 (LRU + 데이터 버전 무효화)
+# ============================
+# 키: (경로, 정렬한 쿼리 파라미터) / 값: 렌더링한 HTML과 ETag
+# 스크래퍼·주가 업데이트·리뷰 저장이 DB의 data_version을 올리면 이전 버전으로 만든 항목은 모두 무시됨
+RESPONSE_CACHE_MAX_ENTRIES = int(os.environ.get("RESPONSE_CACHE_MAX_ENTRIES", 1024))
+RESPONSE_CACHE_MAX_BYTES = int(os.environ.get("RESPONSE_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+DATA_VERSION_CHECK_INTERVAL = float(os.environ.get("DATA_VERSION_CHECK_INTERVAL", 1.0))  # 초, 버전 조회 간격
+
+
+def make_etag(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # 약한 비교: W/ 접두어는 무시
+    candidates = (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+    return etag in candidates
+
+
+class ResponseCache:
+    def __init__(self, max_entries: int = RESPONSE_CACHE_MAX_ENTRIES, max_bytes: int = RESPONSE_CACHE_MAX_BYTES,
+                 check_interval: float = DATA_VERSION_CHECK_INTERVAL):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.check_interval = check_interval
+        self._entries: OrderedDict[tuple, tuple[int, bytes, str, str]] = OrderedDict()
+        self._bytes = 0
+        self._version = 0
+        self._version_checked_at = float("-inf")
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> dict:
+        """조회 적중/실패 수와 현재 저장된 항목 수/바이트"""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries), "bytes": self._bytes}
+
+    def version_expired(self) -> bool:
+        return time.monotonic() - self._version_checked_at >= self.check_interval
+
+    def data_version(self) -> int:
+        """DB의 data_version. 매 요청마다 조회하지 않도록 check_interval초 동안 재사용"""
+        now = time.monotonic()
+        if now - self._version_checked_at >= self.check_interval:
+            try:
+                version = get_data_version()
+            except Exception as e:
+                print(f"데이터 버전 조회 실패: {e}")
+                version = -1  # 확인할 수 없으면 캐시 사용 안 함
+            with self._lock:
+                if version != self._version:
+                    self._clear()
+                self._version, self._version_checked_at = version, now
+        return self._version
+
+    @staticmethod
+    def key(request: Request) -> tuple:
+        return request.url.path, tuple(sorted(request.query_params.multi_items()))
+
+    def get(self, key: tuple, version: int):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: tuple, entry: tuple[int, bytes, str, str]):
+        size = len(entry[1])
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old[1])
+            self._entries[key] = entry
+            self._bytes += size
+            # 가장 오래 안 쓴 항목부터 제거
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted[1])
+
+    def clear(self):
+        with self._lock:
+            self._clear()
+
+    def _clear(self):
+        self._entries.clear()
+        self._bytes = 0
+
+    async def serve(self, request: Request, render) -> Response:
+        """
+        캐시된 응답을 돌려주고, 없으면 render()로 응답을 만들어 저장합니다.
+        버전 조회와 render()는 DB 스레드 풀에서 실행하므로 캐시 적중 시에는 스레드를 거치지 않습니다.
+        If-None-Match가 현재 ETag와 같으면 본문 없이 304를 반환합니다.
+        """
+        if self.version_expired():
+            version = await run_in_db_thread(self.data_version)
+        else:
+            version = self._version
+        key = self.key(request)
+        entry = self.get(key, version) if version >= 0 else None
+
+        if entry is None:
+            response = await run_in_db_thread(render)
+            if response.status_code != 200:
+                return response  # 오류 응답(DB 잠금 등으로 5xx)은 저장하지 않음
+            body = bytes(response.body)
+            entry = (version, body, make_etag(body), response.media_type or "text/html")
+            if version >= 0:
+                self.put(key, entry)
+
+        _, body, etag, media_type = entry
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}  # 브라우저는 매번 ETag로 재검증
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
+        return Response(content=body, media_type=media_type, headers=headers)
+
+
+response_cache = ResponseCache()
+
+
+@register_collector
+def _response_cache_metrics() -> list[str]:
+    stats = response_cache.stats()
+    return [
+        "# HELP response_cache_requests_total Page response cache lookups",
+        "# TYPE response_cache_requests_total counter",
+        f'response_cache_requests_total{{result="hit"}} {stats["hits"]}',
+        f'response_cache_requests_total{{result="miss"}} {stats["misses"]}',
+        "# HELP response_cache_entries Entries held by the page response cache",
+        "# TYPE response_cache_entries gauge",
+        f"response_cache_entries {stats['entries']}",
+        "# HELP response_cache_bytes Bytes held by the page response cache",
+        "# TYPE response_cache_bytes gauge",
+        f"response_cache_bytes {stats['bytes']}",
+    ]
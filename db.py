@@ -1,19 +1,97 @@
 from sqlalchemy import (
-    create_engine, Column, Integer, Float, String, Date, Text, ForeignKey
+    create_engine, event, Column, Integer, Float, String, Date, DateTime, Text, ForeignKey, Index
 )
 from sqlalchemy.orm import declarative_base, relationship, sessionmaker
-from sqlalchemy import text
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy import text, select, bindparam, table, column
+from sqlalchemy.exc import OperationalError, IntegrityError
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+import asyncio
+import contextvars
 import csv
+import functools
+import itertools
+import os
+import re
+from writer import DBWriter
+from metrics import instrument_engine
 
 # ============================
 # DB 설정
 # ============================
-DB_URL = "sqlite:///reports.db"  # 필요하면 파일명 변경
-engine = create_engine(DB_URL, echo=False, future=True)
+# 환경변수로 변경 가능
+DB_URL = os.environ.get("DB_URL", "sqlite:///reports.db")
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", 8))  # 유지하는 연결 수
+DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", 4))  # 바쁠 때 추가로 여는 연결 수
+DB_POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", 30))  # 연결을 기다리는 최대 시간(초)
+DB_ECHO = os.environ.get("DB_ECHO", "0") == "1"  # 실행 SQL 출력
+# 웹 요청의 DB 작업을 실행하는 스레드 수 (기본: 연결 풀 크기와 같게 → 스레드가 연결을 기다리지 않음)
+DB_THREADS = int(os.environ.get("DB_THREADS", 0)) or DB_POOL_SIZE + DB_MAX_OVERFLOW
+
+def _pool_options(url: str) -> dict:
+    # 메모리 DB는 연결 하나를 공유하는 풀을 쓰므로 크기 옵션을 넘기지 않음
+    if url in ("sqlite://", "sqlite:///:memory:"):
+        return {}
+    return {"pool_size": DB_POOL_SIZE, "max_overflow": DB_MAX_OVERFLOW, "pool_timeout": DB_POOL_TIMEOUT}
+
+engine = create_engine(DB_URL, echo=DB_ECHO, future=True, **_pool_options(DB_URL))
 Base = declarative_base()
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
 
+# SQLite 연결 설정 (연결마다 적용)
+# WAL: 쓰기 중에도 읽기가 막히지 않음 (스크래퍼/파이프라인이 쓰는 동안 웹 페이지 조회 가능)
+SQLITE_JOURNAL_MODE = os.environ.get("SQLITE_JOURNAL_MODE", "WAL")
+SQLITE_SYNCHRONOUS = os.environ.get("SQLITE_SYNCHRONOUS", "NORMAL")  # WAL에서는 NORMAL로도 손상되지 않음
+SQLITE_CACHE_SIZE = int(os.environ.get("SQLITE_CACHE_SIZE", -64000))  # 음수면 KiB 단위 (-64000 = 약 64MB)
+SQLITE_MMAP_SIZE = int(os.environ.get("SQLITE_MMAP_SIZE", 256 * 1024 * 1024))  # 바이트
+SQLITE_BUSY_TIMEOUT = int(os.environ.get("SQLITE_BUSY_TIMEOUT", 5000))  # ms, 잠금 대기 시간 ("database is locked" 방지)
+
+@event.listens_for(engine, "connect")
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    if engine.dialect.name != "sqlite":
+        return
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute(f"PRAGMA busy_timeout = {SQLITE_BUSY_TIMEOUT}")
+        if engine.url.database not in (None, "", ":memory:"):
+            cursor.execute(f"PRAGMA journal_mode = {SQLITE_JOURNAL_MODE}")
+        cursor.execute(f"PRAGMA synchronous = {SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA cache_size = {SQLITE_CACHE_SIZE}")
+        cursor.execute(f"PRAGMA mmap_size = {SQLITE_MMAP_SIZE}")
+    finally:
+        cursor.close()
+
+# 쿼리 수/시간 집계, SLOW_QUERY_MS 설정 시 느린 쿼리 출력 (metrics.py)
+instrument_engine(engine)
+
+# 프로세스 안의 모든 쓰기를 순서대로 실행하는 단일 writer (writer.py)
+writer = DBWriter(SessionLocal)
+
+# async 라우트에서 동기 DB 작업을 이벤트 루프 밖에서 실행하기 위한 전용 스레드 풀
+_db_executor = ThreadPoolExecutor(max_workers=DB_THREADS, thread_name_prefix="db")
+
+async def run_in_db_thread(func, *args, **kwargs):
+    """
+    func(*args, **kwargs)를 DB 스레드 풀에서 실행하고 결과를 기다립니다.
+    동시에 실행되는 작업은 DB_THREADS개로 제한되고, 나머지는 이벤트 루프를 막지 않고 대기합니다.
+    contextvars는 호출한 쪽의 값을 복사해서 넘깁니다.
+    """
+    loop = asyncio.get_running_loop()
+    call = functools.partial(contextvars.copy_context().run, func, *args, **kwargs)
+    return await loop.run_in_executor(_db_executor, call)
+
+async def iterate_in_db_thread(iterator):
+    """동기 iterator(DB 커서를 읽는 generator 등)를 DB 스레드 풀에서 한 조각씩 꺼내는 async generator"""
+    done = object()
+    try:
+        while (item := await run_in_db_thread(next, iterator, done)) is not done:
+            yield item
+    finally:
+        close = getattr(iterator, "close", None)
+        if close is not None:
+            await run_in_db_thread(close)
+
 
 # ============================
 # 테이블 정의
@@ -73,7 +151,8 @@ class Report(Base):
     fair_price = Column(Integer)
     current_price = Column(Integer)
     expected_return = Column(Float)
-    attachment_url = Column(String(500))
+    attachment_url = Column(String(500), unique=True, index=True)  # 중복 적재 방지 키
+    report_idx = Column(Integer, unique=True, index=True, nullable=True)  # 첨부파일 URL의 report_idx (PDF 파일명)
 
     summary = Column(Text, nullable=True)
     novice_content = Column(Text, nullable=True)
@@ -89,6 +168,114 @@ class Report(Base):
     author = relationship("Author", back_populates="reports")
     rating = relationship("Rating", back_populates="reports")
 
+    __table_args__ = (
+        # 종목별 최신 리포트 조회 (stock_summary 갱신, 종목 검색)
+        Index("ix_reports_stock_written", "stock_id", "written_date"),
+    )
+
+
+# 6) 종목별 요약 (statistic 페이지용 집계 테이블)
+# 리포트 적재/주가 업데이트 시 변경된 종목만 refresh_stock_summary로 다시 계산
+class StockSummary(Base):
+    __tablename__ = "stock_summary"
+
+    stock_id = Column(Integer, ForeignKey("stocks.id"), primary_key=True)
+    stock_code = Column(String(20), nullable=False)
+    stock_name = Column(String(100), nullable=False)
+    current_price = Column(Integer)
+    avg_fair_price = Column(Float)
+    avg_expected_return = Column(Float, index=True)
+    main_rating = Column(String(10))
+    report_count = Column(Integer, nullable=False, default=0)
+
+
+# 7) 파이프라인 작업 상태 (리포트별 단계: scraped → downloaded → extracted → reviewed)
+class ReportJob(Base):
+    __tablename__ = "report_jobs"
+
+    report_id = Column(Integer, ForeignKey("reports.id"), primary_key=True)
+    stage = Column(String(20), nullable=False, default="scraped")  # 마지막으로 완료한 단계
+    attempts = Column(Integer, nullable=False, default=0)  # 다음 단계 연속 실패 횟수
+    last_error = Column(Text, nullable=True)
+    pdf_sha256 = Column(String(64), nullable=True)  # 텍스트 추출 시 기록한 PDF 내용 해시 (캐시 키)
+
+    scraped_at = Column(DateTime, nullable=True)
+    downloaded_at = Column(DateTime, nullable=True)
+    extracted_at = Column(DateTime, nullable=True)
+    reviewed_at = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        # 단계별 대기 작업 조회
+        Index("ix_report_jobs_stage", "stage", "report_id"),
+    )
+
+
+# 8) 리뷰 생성 결과 캐시 (같은 PDF 내용 + 같은 프롬프트 버전이면 다시 생성하지 않음)
+class ReviewCache(Base):
+    __tablename__ = "review_cache"
+
+    pdf_sha256 = Column(String(64), primary_key=True)
+    prompt_version = Column(String(20), primary_key=True)
+    backend = Column(String(50), nullable=True)
+
+    summary = Column(Text, nullable=True)
+    novice_content = Column(Text, nullable=True)
+    expert_content = Column(Text, nullable=True)
+    created_at = Column(DateTime, nullable=True)
+
+
+# 9) 메타 정보 (key → 정수 값). data_version: 화면에 보이는 데이터가 바뀔 때마다 1씩 증가
+class Meta(Base):
+    __tablename__ = "meta"
+
+    key = Column(String(50), primary_key=True)
+    value = Column(Integer, nullable=False, default=0)
+
+
+# 10) 리포트별 목표가 적중 평가 (accuracy.py가 계산)
+# complete=0이면 평가 기간(horizon_days)이 아직 끝나지 않아 다음 실행에서 다시 계산
+class ReportAccuracy(Base):
+    __tablename__ = "report_accuracy"
+
+    report_id = Column(Integer, ForeignKey("reports.id"), primary_key=True)
+    author_id = Column(Integer, ForeignKey("authors.id"), nullable=True, index=True)
+    broker_id = Column(Integer, ForeignKey("brokers.id"), nullable=True, index=True)
+    horizon_days = Column(Integer, nullable=False)
+
+    base_price = Column(Float)  # 작성일(이후 첫 거래일) 종가
+    end_price = Column(Float)  # 평가 기간 마지막 거래일 종가
+    hit = Column(Integer)  # 기간 안에 목표가 도달 (1/0)
+    signed_error = Column(Float)  # (기간 말 종가 - 목표가) / 목표가, 음수면 목표가에 못 미침
+    direction_correct = Column(Integer, nullable=True)  # 평가의견 방향 적중 (평가의견 없음은 NULL)
+    complete = Column(Integer, nullable=False, default=0)
+    evaluated_at = Column(DateTime)
+
+
+# 11) 애널리스트/증권사별 적중 통계 (complete=1인 평가만 집계)
+class AuthorAccuracy(Base):
+    __tablename__ = "author_accuracy"
+
+    author_id = Column(Integer, ForeignKey("authors.id"), primary_key=True)
+    report_count = Column(Integer, nullable=False, default=0)
+    hit_rate = Column(Float, index=True)
+    mean_signed_error = Column(Float)
+    mean_abs_error = Column(Float)
+    direction_accuracy = Column(Float)
+    updated_at = Column(DateTime)
+
+
+class BrokerAccuracy(Base):
+    __tablename__ = "broker_accuracy"
+
+    broker_id = Column(Integer, ForeignKey("brokers.id"), primary_key=True)
+    report_count = Column(Integer, nullable=False, default=0)
+    hit_rate = Column(Float, index=True)
+    mean_signed_error = Column(Float)
+    mean_abs_error = Column(Float)
+    direction_accuracy = Column(Float)
+    updated_at = Column(DateTime)
+
 
 # ============================
 # 유틸 함수들
@@ -122,6 +309,22 @@ def parse_float(value: str | None):
     except ValueError:
         return None
 
+REPORT_IDX_RE = re.compile(r"report_idx=(\d+)")
+
+def parse_report_idx(url: str | None) -> int | None:
+    """첨부파일 URL에서 report_idx 추출. 예: .../downpdf?report_idx=644830 -> 644830"""
+    if not url:
+        return None
+    match = REPORT_IDX_RE.search(url)
+    return int(match.group(1)) if match else None
+
+def report_idx_from_filename(filename: str | None) -> int | None:
+    """PDF 파일명에서 report_idx 추출. 예: 644830.pdf -> 644830"""
+    if not filename:
+        return None
+    stem = os.path.basename(filename).replace(".pdf", "")
+    return int(stem) if stem.isdigit() else None
+
 # 평가의견 정규화: Buy / Sell / Hold / None만 사용
 def normalize_rating(raw: str | None) -> str:
     if raw is None:
@@ -149,7 +352,32 @@ def normalize_rating(raw: str | None) -> str:
 # ============================
 
 def init_db():
+    # 예전 버전의 stock_summary 뷰가 남아 있으면 테이블 생성 전에 제거
+    with engine.begin() as conn:
+        is_view = conn.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'view' AND name = 'stock_summary'")
+        ).first()
+        if is_view:
+            conn.execute(text("DROP VIEW stock_summary"))
+
     Base.metadata.create_all(engine)
+    migrate_schema()
+    create_search_index()
+
+    # 뷰에서 테이블로 바뀐 직후 등 요약이 비어 있으면 한 번 전체 계산
+    with engine.connect() as conn:
+        needs_summary = (
+            conn.execute(text("SELECT 1 FROM reports LIMIT 1")).first() is not None
+            and conn.execute(text("SELECT 1 FROM stock_summary LIMIT 1")).first() is None
+        )
+        # 현재가가 있는데 기대수익률이 비어 있는 리포트 (예전 버전에서 적재) → 한 번 전체 계산
+        needs_returns = conn.execute(text("""
+            SELECT 1 FROM reports r JOIN stocks s ON s.id = r.stock_id
+            WHERE s.current_price > 0 AND r.fair_price > 0 AND r.expected_return IS NULL
+            LIMIT 1
+        """)).first() is not None
+    if needs_summary or needs_returns:
+        rebuild_stock_summary()
 
     # ratings 테이블에 코드 채우기
     with SessionLocal() as session:
@@ -164,6 +392,111 @@ def init_db():
         session.commit()
 
 
+def _add_column_if_missing(conn, table_name: str, column_name: str, ddl: str) -> bool:
+    """컬럼이 없으면 추가하고 True 반환"""
+    columns = {row[1] for row in conn.execute(text(f"PRAGMA table_info({table_name})"))}
+    if column_name in columns:
+        return False
+    conn.execute(text(f"ALTER TABLE {table_name} ADD COLUMN {column_name} {ddl}"))
+    return True
+
+def _remove_duplicate_reports(conn, column_name: str) -> int:
+    """
+    column_name 값이 같은 리포트 중 id가 가장 작은 행만 남기고 삭제한 뒤 삭제한 행 수를 반환
+    (유니크 인덱스를 만들기 전 정리용. 삭제한 리포트를 가리키는 작업/적중률/검색/종목 요약 행도 함께 정리)
+    """
+    dup_of = dict(conn.execute(text(f"""
+        SELECT r.id, k.keep_id
+        FROM reports r
+        JOIN (
+            SELECT {column_name} AS value, MIN(id) AS keep_id FROM reports
+            WHERE {column_name} IS NOT NULL
+            GROUP BY {column_name} HAVING COUNT(*) > 1
+        ) k ON k.value = r.{column_name}
+        WHERE r.id <> k.keep_id
+    """)).all())
+    if not dup_of:
+        return 0
+
+    ids_param = bindparam("ids", expanding=True)
+    dup_ids = list(dup_of)
+    stock_ids, author_ids, broker_ids = set(), set(), set()
+    for i in range(0, len(dup_ids), _IN_CHUNK):
+        chunk = dup_ids[i:i + _IN_CHUNK]
+        params = {"ids": chunk}
+        for stock_id, author_id, broker_id in conn.execute(
+            text("SELECT stock_id, author_id, broker_id FROM reports WHERE id IN :ids").bindparams(ids_param), params
+        ):
+            stock_ids.add(stock_id)
+            author_ids.add(author_id)
+            broker_ids.add(broker_id)
+
+        # 남기는 리포트에 요약이 없으면 삭제할 리포트의 요약과 작업 상태를 옮김
+        for dup_id in chunk:
+            conn.execute(text("""
+                UPDATE reports SET
+                    summary = (SELECT summary FROM reports WHERE id = :dup_id),
+                    novice_content = (SELECT novice_content FROM reports WHERE id = :dup_id),
+                    expert_content = (SELECT expert_content FROM reports WHERE id = :dup_id)
+                WHERE id = :keep_id AND summary IS NULL
+            """), {"dup_id": dup_id, "keep_id": dup_of[dup_id]})
+            conn.execute(
+                text("UPDATE OR IGNORE report_jobs SET report_id = :keep_id WHERE report_id = :dup_id"),
+                {"dup_id": dup_id, "keep_id": dup_of[dup_id]},
+            )
+        conn.execute(text("DELETE FROM report_jobs WHERE report_id IN :ids").bindparams(ids_param), params)
+        conn.execute(text("DELETE FROM report_accuracy WHERE report_id IN :ids").bindparams(ids_param), params)
+        if search_index_available():
+            conn.execute(text("DELETE FROM report_search WHERE rowid IN :ids").bindparams(ids_param), params)
+        conn.execute(text("DELETE FROM reports WHERE id IN :ids").bindparams(ids_param), params)
+
+    refresh_stock_summary(conn, sorted(stock_ids))
+    from accuracy import refresh_accuracy_aggregates  # accuracy가 db를 import하므로 여기서 가져옴
+    refresh_accuracy_aggregates(
+        conn,
+        sorted(i for i in author_ids if i is not None),
+        sorted(i for i in broker_ids if i is not None),
+    )
+    print(f"{column_name} 중복 리포트 {len(dup_ids)}건 정리")
+    return len(dup_ids)
+
+# 기존 DB에 create_all이 추가하지 못하는 인덱스/컬럼 반영
+def migrate_schema():
+    with engine.begin() as conn:
+        # 이미 중복 행이 있으면 유니크 인덱스를 만들 수 없으므로 먼저 정리
+        _remove_duplicate_reports(conn, "attachment_url")
+        try:
+            conn.execute(text(
+                "CREATE UNIQUE INDEX IF NOT EXISTS ix_reports_attachment_url ON reports (attachment_url)"
+            ))
+        except IntegrityError as e:
+            print(f"attachment_url 유니크 인덱스 생성 실패: {e}")
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_reports_stock_written ON reports (stock_id, written_date)"
+        ))
+
+        # report_idx 컬럼 추가 + 기존 행 채우기 (URL의 'report_idx=' 뒤 숫자)
+        if _add_column_if_missing(conn, "reports", "report_idx", "INTEGER"):
+            conn.execute(text("""
+                UPDATE reports
+                SET report_idx = CAST(substr(attachment_url, instr(attachment_url, 'report_idx=') + 11) AS INTEGER)
+                WHERE report_idx IS NULL AND instr(attachment_url, 'report_idx=') > 0
+            """))
+        # URL만 다른 같은 리포트(http/https 등)는 report_idx가 겹치므로 먼저 정리
+        _remove_duplicate_reports(conn, "report_idx")
+        try:
+            conn.execute(text(
+                "CREATE UNIQUE INDEX IF NOT EXISTS ix_reports_report_idx ON reports (report_idx)"
+            ))
+        except IntegrityError as e:
+            print(f"report_idx 유니크 인덱스 생성 실패: {e}")
+
+        _add_column_if_missing(conn, "report_jobs", "pdf_sha256", "VARCHAR(64)")
+
+        # 예전 기본값(stub 백엔드)으로 캐시된 결과는 실제 백엔드가 다시 만들도록 제거
+        conn.execute(text("DELETE FROM review_cache WHERE backend = 'stub'"))
+
+
 # ============================
 # CSV → DB 적재
 # ============================
@@ -173,207 +506,599 @@ def init_db():
 # ============================
 
 def save_reports(reports_data: list[dict]):
-    session = SessionLocal()
-    
+    # 쓰기는 단일 writer 스레드에서 한 트랜잭션으로 실행
+    try:
+        writer.write(_save_reports, reports_data)
+        print(f"'{DB_URL}'에 저장 완료")
+    except Exception as e:
+        print("에러 발생:", e)
+
+def _save_reports(session, reports_data: list[dict]):
     # 캐시 (중복 insert 방지)
     stock_cache: dict[str, Stock] = {}
     broker_cache: dict[str, Broker] = {}
     author_cache: dict[str, Author] = {}
+    new_reports: list[Report] = []
+    seen_urls: set[str] = set()  # 이번 호출에서 이미 추가한 URL (autoflush가 꺼져 있어 조회로는 안 보임)
+    seen_idx: set[int] = set()  # 이번 호출에서 이미 추가한 report_idx
 
-    try:
-        for row in reports_data:
-            # 1) 공통 파싱
-            # row는 이미 적절한 타입(date, int, float 등)으로 변환되어 들어온다고 가정하거나, 여기서 변환
-            # scraper.py에서 변환해서 넘겨주는 것이 좋음.
-            # 여기서는 안전장치로 한번 더 체크하거나 그대로 사용
+    for row in reports_data:
+        # 1) 공통 파싱
+        # row는 이미 적절한 타입(date, int, float 등)으로 변환되어 들어온다고 가정하거나, 여기서 변환
+        # scraper.py에서 변환해서 넘겨주는 것이 좋음.
+        # 여기서는 안전장치로 한번 더 체크하거나 그대로 사용
+        
+        written_date = row.get("written_date")
+        if isinstance(written_date, str):
+            written_date = datetime.strptime(written_date, "%Y-%m-%d").date()
             
-            written_date = row.get("written_date")
-            if isinstance(written_date, str):
-                written_date = datetime.strptime(written_date, "%Y-%m-%d").date()
-                
-            stock_name = normalize_str(row.get("stock_name"))
-            stock_code = normalize_str(row.get("stock_code"))
-            title = normalize_str(row.get("title"))
-
-            fair_price = row.get("fair_price")
-            current_price = row.get("current_price")
-            expected_return = row.get("expected_return")
-
-            rating_code = normalize_rating(row.get("rating_code"))
-            author_name = normalize_str(row.get("author_name"))
-            broker_name = normalize_str(row.get("broker_name"))
-
-            company_info_url = normalize_str(row.get("company_info_url"))
-            attachment_url = normalize_str(row.get("attachment_url"))
-
-            # 중복 체크: attachment_url이 같으면 이미 있는 것으로 간주
-            if attachment_url:
-                existing = session.query(Report).filter_by(attachment_url=attachment_url).first()
-                if existing:
-                    continue
-
-            # 2) 종목 (stocks) 처리
-            stock = None
-            if stock_code in stock_cache:
-                stock = stock_cache[stock_code]
+        stock_name = normalize_str(row.get("stock_name"))
+        stock_code = normalize_str(row.get("stock_code"))
+        title = normalize_str(row.get("title"))
+
+        fair_price = row.get("fair_price")
+        current_price = row.get("current_price")
+        expected_return = row.get("expected_return")
+
+        rating_code = normalize_rating(row.get("rating_code"))
+        author_name = normalize_str(row.get("author_name"))
+        broker_name = normalize_str(row.get("broker_name"))
+
+        company_info_url = normalize_str(row.get("company_info_url"))
+        attachment_url = normalize_str(row.get("attachment_url"))
+
+        # 중복 체크: attachment_url이 같으면 이미 있는 것으로 간주
+        if attachment_url:
+            if attachment_url in seen_urls:
+                continue
+            existing = session.query(Report).filter_by(attachment_url=attachment_url).first()
+            if existing:
+                continue
+            seen_urls.add(attachment_url)
+
+        # URL이 달라도 report_idx가 같으면 같은 리포트 (report_idx도 유니크)
+        report_idx = parse_report_idx(attachment_url)
+        if report_idx is not None:
+            if report_idx in seen_idx:
+                continue
+            if session.query(Report.id).filter_by(report_idx=report_idx).first():
+                continue
+            seen_idx.add(report_idx)
+
+        # 2) 종목 (stocks) 처리
+        stock = None
+        if stock_code in stock_cache:
+            stock = stock_cache[stock_code]
+        else:
+            stock = session.query(Stock).filter_by(stock_code=stock_code).one_or_none()
+            if stock is None:
+                stock = Stock(
+                    stock_code=stock_code,
+                    stock_name=stock_name or "",
+                    company_info_url=company_info_url,
+                )
+                session.add(stock)
+                session.flush()  # id 확보
+            stock_cache[stock_code] = stock
+
+        # 3) 증권사 (brokers) 처리
+        broker = None
+        if broker_name:
+            if broker_name in broker_cache:
+                broker = broker_cache[broker_name]
             else:
-                stock = session.query(Stock).filter_by(stock_code=stock_code).one_or_none()
-                if stock is None:
-                    stock = Stock(
-                        stock_code=stock_code,
-                        stock_name=stock_name or "",
-                        company_info_url=company_info_url,
-                    )
-                    session.add(stock)
-                    session.flush()  # id 확보
-                stock_cache[stock_code] = stock
-
-            # 3) 증권사 (brokers) 처리
-            broker = None
-            if broker_name:
-                if broker_name in broker_cache:
-                    broker = broker_cache[broker_name]
-                else:
-                    broker = session.query(Broker).filter_by(name=broker_name).one_or_none()
-                    if broker is None:
-                        broker = Broker(name=broker_name)
-                        session.add(broker)
-                        session.flush()
-                    broker_cache[broker_name] = broker
-
-            # 4) 애널리스트 (authors) 처리
-            author = None
-            if author_name:
-                if author_name in author_cache:
-                    author = author_cache[author_name]
-                else:
-                    author = session.query(Author).filter_by(name=author_name).one_or_none()
-                    if author is None:
-                        author = Author(name=author_name)
-                        session.add(author)
-                        session.flush()
-                    author_cache[author_name] = author
-
-            # 5) 리포트 (reports) 삽입
-            report = Report(
-                written_date=written_date,
-                title=title or "",
-                fair_price=fair_price,
-                current_price=current_price,
-                expected_return=expected_return,
-                attachment_url=attachment_url,
-                summary=row.get("summary"),
-                novice_content=row.get("novice_content"),
-                expert_content=row.get("expert_content"),
-
-                stock_id=stock.id,
-                broker_id=broker.id if broker else None,
-                author_id=author.id if author else None,
-                rating_code=rating_code,
-            )
-            session.add(report)
+                broker = session.query(Broker).filter_by(name=broker_name).one_or_none()
+                if broker is None:
+                    broker = Broker(name=broker_name)
+                    session.add(broker)
+                    session.flush()
+                broker_cache[broker_name] = broker
 
-        session.commit()
-        print(f"'{DB_URL}'에 저장 완료")
+        # 4) 애널리스트 (authors) 처리
+        author = None
+        if author_name:
+            if author_name in author_cache:
+                author = author_cache[author_name]
+            else:
+                author = session.query(Author).filter_by(name=author_name).one_or_none()
+                if author is None:
+                    author = Author(name=author_name)
+                    session.add(author)
+                    session.flush()
+                author_cache[author_name] = author
+
+        # 5) 리포트 (reports) 삽입
+        report = Report(
+            written_date=written_date,
+            title=title or "",
+            fair_price=fair_price,
+            current_price=current_price,
+            expected_return=expected_return,
+            attachment_url=attachment_url,
+            report_idx=report_idx,
+            summary=row.get("summary"),
+            novice_content=row.get("novice_content"),
+            expert_content=row.get("expert_content"),
+
+            stock_id=stock.id,
+            broker_id=broker.id if broker else None,
+            author_id=author.id if author else None,
+            rating_code=rating_code,
+        )
+        session.add(report)
+        new_reports.append(report)
+
+    session.flush()
+    sync_search_index(session, [r.id for r in new_reports])
+    stock_ids = list({r.stock_id for r in new_reports})
+    refresh_report_returns(session, stock_ids)
+    refresh_stock_summary(session, stock_ids)
+    if new_reports:
+        bump_data_version(session)
+
+# ============================
+# 대량 적재 (bulk)
+# ============================
+BULK_BATCH_SIZE = 1000
+_IN_CHUNK = 500  # IN (...) 바인드 파라미터 개수 제한 대응
+
+def _resolve_ids(session, model, key: str, values: dict[str, dict]) -> dict[str, int]:
+    """
+    key 컬럼 값 → id 매핑을 IN (...) 조회로 한 번에 구합니다.
+    없는 값은 INSERT ... ON CONFLICT DO NOTHING으로 넣은 뒤 다시 조회합니다.
+    values: {키 값: 새로 만들 때 넣을 컬럼 dict}
+    """
+    key_col = getattr(model, key)
+    ids: dict[str, int] = {}
+
+    def fetch(keys):
+        for i in range(0, len(keys), _IN_CHUNK):
+            rows = session.execute(select(key_col, model.id).where(key_col.in_(keys[i:i + _IN_CHUNK])))
+            ids.update({k: id_ for k, id_ in rows})
+
+    fetch(list(values))
+    missing = [k for k in values if k not in ids]
+    if missing:
+        session.execute(
+            sqlite_insert(model.__table__).on_conflict_do_nothing(index_elements=[key]),
+            [values[k] for k in missing],
+        )
+        fetch(missing)
+    return ids
+
+def _parse_report_row(row: dict) -> dict | None:
+    """save_reports와 같은 규칙으로 한 행을 정리. 종목코드가 없으면 None"""
+    stock_code = normalize_str(row.get("stock_code"))
+    written_date = row.get("written_date")
+    if isinstance(written_date, str):
+        written_date = datetime.strptime(written_date.strip(), "%Y-%m-%d").date()
+    if stock_code is None or written_date is None:
+        return None
+
+    return {
+        "written_date": written_date,
+        "stock_code": stock_code,
+        "stock_name": normalize_str(row.get("stock_name")) or "",
+        "company_info_url": normalize_str(row.get("company_info_url")),
+        "title": normalize_str(row.get("title")) or "",
+        "fair_price": row.get("fair_price"),
+        "current_price": row.get("current_price"),
+        "expected_return": row.get("expected_return"),
+        "rating_code": normalize_rating(row.get("rating_code")),
+        "author_name": normalize_str(row.get("author_name")),
+        "broker_name": normalize_str(row.get("broker_name")),
+        "attachment_url": normalize_str(row.get("attachment_url")),
+        "report_idx": parse_report_idx(row.get("attachment_url")),
+        "summary": row.get("summary"),
+        "novice_content": row.get("novice_content"),
+        "expert_content": row.get("expert_content"),
+    }
+
+def _bulk_insert_batch(session, rows: list[dict]) -> int:
+    stock_ids = _resolve_ids(session, Stock, "stock_code", {
+        r["stock_code"]: {
+            "stock_code": r["stock_code"],
+            "stock_name": r["stock_name"],
+            "company_info_url": r["company_info_url"],
+        }
+        for r in rows
+    })
+    broker_ids = _resolve_ids(session, Broker, "name", {
+        r["broker_name"]: {"name": r["broker_name"]} for r in rows if r["broker_name"]
+    })
+    author_ids = _resolve_ids(session, Author, "name", {
+        r["author_name"]: {"name": r["author_name"]} for r in rows if r["author_name"]
+    })
+
+    report_rows = [
+        {
+            "written_date": r["written_date"],
+            "title": r["title"],
+            "fair_price": r["fair_price"],
+            "current_price": r["current_price"],
+            "expected_return": r["expected_return"],
+            "attachment_url": r["attachment_url"],
+            "report_idx": r["report_idx"],
+            "summary": r["summary"],
+            "novice_content": r["novice_content"],
+            "expert_content": r["expert_content"],
+            "stock_id": stock_ids[r["stock_code"]],
+            "broker_id": broker_ids.get(r["broker_name"]),
+            "author_id": author_ids.get(r["author_name"]),
+            "rating_code": r["rating_code"],
+        }
+        for r in rows
+    ]
+
+    # 이번 배치에서 새로 들어간 행 = 적재 전 최대 id보다 큰 행 (쓰기는 한 트랜잭션에서 직렬화됨)
+    max_id = session.execute(text("SELECT COALESCE(MAX(id), 0) FROM reports")).scalar()
+    session.execute(
+        sqlite_insert(Report.__table__).on_conflict_do_nothing(),  # attachment_url / report_idx 중복
+        report_rows,
+    )
+    inserted = session.execute(select(Report.id, Report.stock_id).where(Report.id > max_id)).all()
+
+    sync_search_index(session, [id_ for id_, _ in inserted])
+    stock_ids = list({stock_id for _, stock_id in inserted})
+    refresh_report_returns(session, stock_ids)
+    refresh_stock_summary(session, stock_ids)
+    if inserted:
+        bump_data_version(session)
+    return len(inserted)
+
+def bulk_save_reports(reports_data, batch_size: int = BULK_BATCH_SIZE) -> dict:
+    """
+    save_reports의 대량 적재 버전. 행 단위 조회 대신
+    - 종목/증권사/애널리스트 id를 배치마다 IN (...) 몇 번으로 해결하고
+    - attachment_url/report_idx 유니크 인덱스 + INSERT ... ON CONFLICT DO NOTHING으로 중복을 거르며
+    - batch_size 단위 executemany로 넣고 배치마다 커밋합니다.
+    반환: {"inserted": 새로 넣은 행 수, "skipped": 중복으로 건너뛴 행 수, "invalid": 종목코드/날짜 없는 행 수}
+    """
+    counts = {"inserted": 0, "skipped": 0, "invalid": 0}
+    batch: list[dict] = []
+
+    def flush_batch():
+        # 배치마다 writer 스레드에서 커밋 (다른 쓰기 작업과 순서대로 실행)
+        inserted = writer.write(_bulk_insert_batch, list(batch))
+        counts["inserted"] += inserted
+        counts["skipped"] += len(batch) - inserted
+        batch.clear()
+
+    try:
+        for row in reports_data:
+            parsed = _parse_report_row(row)
+            if parsed is None:
+                counts["invalid"] += 1
+                continue
+            batch.append(parsed)
+            if len(batch) >= batch_size:
+                flush_batch()
+        if batch:
+            flush_batch()
+        print(f"'{DB_URL}'에 저장 완료: {counts}")
     except Exception as e:
-        session.rollback()
         print("에러 발생:", e)
-    finally:
-        session.close()
+    return counts
 
-def load_csv_to_db(csv_path: str, reviews_csv_path: str = None):
-    # Legacy support or initial seeding
-    reports_data = []
-    
-    # 리뷰 데이터 로드
-    reviews_map = {}
-    if reviews_csv_path:
+# ============================
+# CSV 적재 (스트리밍)
+# ============================
+CSV_BATCH_SIZE = 5000
+
+def _csv_row_to_report(row: dict) -> dict:
+    # CSV 컬럼 → save_reports 키
+    return {
+        "written_date": row["작성일"].strip(),
+        "stock_name": row["종목명"],
+        "stock_code": row["종목코드"],
+        "title": row["제목"],
+        "fair_price": parse_int(row.get("적정가격")),
+        "current_price": parse_int(row.get("현재가격")),
+        "expected_return": parse_float(row.get("기대수익률")),
+        "rating_code": row.get("평가의견"),
+        "author_name": row.get("작성자"),
+        "broker_name": row.get("작성기관"),
+        "company_info_url": row.get("기업정보"),
+        "attachment_url": row.get("첨부파일"),
+    }
+
+def _csv_row_to_review(row: dict) -> dict | None:
+    filename = row.get("filename") or ""
+    if not filename.endswith(".pdf"):
+        return None
+    return {
+        "filename": filename,
+        "summary": row.get("summary"),
+        "novice_content": row.get("novice_content"),
+        "expert_content": row.get("expert_content"),
+    }
+
+def load_csv_to_db(csv_path: str, reviews_csv_path: str = None, batch_size: int = CSV_BATCH_SIZE,
+                   start_row: int = 0) -> dict:
+    """
+    리포트 CSV를 한 줄씩 읽어 batch_size행마다 적재/커밋합니다. (파일 크기와 관계없이 메모리 일정)
+    - start_row: 건너뛸 데이터 행 수. 중단되면 마지막으로 출력된 '다음 시작 행'으로 이어서 실행
+    - reviews_csv_path: 리포트 적재 후 리뷰 CSV도 같은 방식으로 읽어 report_idx 인덱스로 연결
+      (이미 리뷰가 있는 리포트는 덮어쓰지 않음)
+    반환: {"inserted", "skipped", "invalid", "errors", "reviews", "next_row"}
+    """
+    totals = {"inserted": 0, "skipped": 0, "invalid": 0, "errors": 0, "reviews": 0, "next_row": start_row}
+
+    def flush(batch: list[dict], first_row: int, last_row: int, invalid: int, errors: int):
+        inserted = 0
         try:
-            with open(reviews_csv_path, newline="", encoding="utf-8-sig") as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    filename = row.get("filename", "")
-                    if filename.endswith(".pdf"):
-                        report_id = filename.replace(".pdf", "")
-                        reviews_map[report_id] = {
-                            "summary": row.get("summary"),
-                            "novice_content": row.get("novice_content"),
-                            "expert_content": row.get("expert_content"),
-                        }
+            if batch:
+                inserted = writer.write(_bulk_insert_batch, batch)
+            skipped = len(batch) - inserted
         except Exception as e:
-            print(f"리뷰 데이터 로드 실패: {e}")
+            print(f"  행 {first_row}~{last_row} 저장 실패: {e}")
+            skipped, errors = 0, errors + len(batch)
+        totals["inserted"] += inserted
+        totals["skipped"] += skipped
+        totals["invalid"] += invalid
+        totals["errors"] += errors
+        totals["next_row"] = last_row + 1
+        print(
+            f"  행 {first_row}~{last_row}: 신규 {inserted}, 중복 {skipped}, 무효 {invalid}, 오류 {errors} "
+            f"(다음 시작 행: {last_row + 1})"
+        )
 
     try:
         with open(csv_path, newline="", encoding="utf-8-sig") as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                # Map CSV columns to save_reports expected keys
-                data = {
-                    "written_date": row["작성일"].strip(),
-                    "stock_name": row["종목명"],
-                    "stock_code": row["종목코드"],
-                    "title": row["제목"],
-                    "fair_price": parse_int(row.get("적정가격")),
-                    "current_price": parse_int(row.get("현재가격")),
-                    "expected_return": parse_float(row.get("기대수익률")),
-                    "rating_code": row.get("평가의견"),
-                    "author_name": row.get("작성자"),
-                    "broker_name": row.get("작성기관"),
-                    "company_info_url": row.get("기업정보"),
-                    "attachment_url": row.get("첨부파일"),
-                }
-                
-                # Merge review data if available
-                attachment_url = data["attachment_url"]
-                if attachment_url:
-                    import re
-                    match = re.search(r"report_idx=(\d+)", attachment_url)
-                    if match:
-                        r_id = match.group(1)
-                        if r_id in reviews_map:
-                            review = reviews_map[r_id]
-                            data.update(review)
-                
-                reports_data.append(data)
-        
-        save_reports(reports_data)
-        
+            # 행 번호는 헤더 다음 데이터 행부터 0으로 셈
+            reader = itertools.islice(csv.DictReader(f), start_row, None)
+            batch, invalid, errors = [], 0, 0
+            first_row, last_row = start_row, start_row - 1
+            for row_number, row in enumerate(reader, start=start_row):
+                last_row = row_number
+                try:
+                    parsed = _parse_report_row(_csv_row_to_report(row))
+                except Exception:
+                    errors += 1  # 날짜 형식 오류, 필수 컬럼 누락 등
+                else:
+                    if parsed is None:
+                        invalid += 1
+                    else:
+                        batch.append(parsed)
+                if row_number + 1 - first_row >= batch_size:
+                    flush(batch, first_row, row_number, invalid, errors)
+                    batch, invalid, errors, first_row = [], 0, 0, row_number + 1
+            if last_row >= first_row:
+                flush(batch, first_row, last_row, invalid, errors)
     except Exception as e:
         print(f"CSV 로드 실패: {e}")
+        return totals
+
+    if reviews_csv_path:
+        totals["reviews"] = load_reviews_csv(reviews_csv_path, batch_size)
+    print(f"CSV 적재 완료: {totals}")
+    return totals
+
+def load_reviews_csv(reviews_csv_path: str, batch_size: int = CSV_BATCH_SIZE) -> int:
+    """리뷰 CSV(filename, summary, novice_content, expert_content)를 batch_size행씩 리포트에 반영"""
+    updated = 0
+    try:
+        with open(reviews_csv_path, newline="", encoding="utf-8-sig") as f:
+            reviews = (_csv_row_to_review(row) for row in csv.DictReader(f))
+            reviews = (review for review in reviews if review is not None)
+            while batch := list(itertools.islice(reviews, batch_size)):
+                updated += update_report_reviews(batch, only_missing=True)
+    except Exception as e:
+        print(f"리뷰 데이터 로드 실패: {e}")
+    print(f"리뷰 {updated}건 반영")
+    return updated
 
 # ============================
-# 뷰 생성
+# 검색 인덱스 (SQLite FTS5, trigram)
 # ============================
-def create_stock_summary_view():
+# trigram 토크나이저는 부분 문자열 검색을 지원하므로 LIKE '%q%'를 대체할 수 있음 (SQLite 3.34+)
+# rowid = reports.id
+report_search = table(
+    "report_search",
+    column("rowid"), column("rank"),
+    column("stock_name"), column("stock_code"), column("broker_name"), column("author_name"), column("title"),
+)
+SEARCH_COLUMNS = ("stock_name", "stock_code", "broker_name", "author_name", "title")
+SEARCH_MIN_LENGTH = 3  # trigram 특성상 3글자 미만은 인덱스로 찾을 수 없음
+
+_search_available: bool | None = None
+
+def create_search_index():
+    global _search_available
+    try:
+        with engine.begin() as conn:
+            conn.execute(text(f"""
+                CREATE VIRTUAL TABLE IF NOT EXISTS report_search
+                USING fts5({", ".join(SEARCH_COLUMNS)}, tokenize = 'trigram')
+            """))
+        _search_available = True
+    except OperationalError as e:
+        # FTS5/trigram 미지원 SQLite → LIKE 검색으로 동작
+        print(f"검색 인덱스 생성 실패 (LIKE 검색 사용): {e}")
+        _search_available = False
+        return
+
     with engine.connect() as conn:
-        # 기존 뷰 있으면 지우고 다시 생성
-        conn.execute(text("DROP VIEW IF EXISTS stock_summary"))
-        conn.execute(text("""
-            CREATE VIEW stock_summary AS
-            SELECT
-                s.stock_code              AS stock_code,
-                s.stock_name              AS stock_name,
-                (
-                    SELECT r2.current_price
-                    FROM reports r2
-                    WHERE r2.stock_id = s.id
-                    ORDER BY r2.written_date DESC, r2.id DESC
-                    LIMIT 1
-                ) AS current_price,
-                AVG(r.fair_price)         AS avg_fair_price,
-                AVG(r.expected_return)    AS avg_expected_return,
-                (
-                    SELECT r3.rating_code
-                    FROM reports r3
-                    WHERE r3.stock_id = s.id
-                    ORDER BY r3.written_date DESC, r3.id DESC
-                    LIMIT 1
-                ) AS main_rating
-            FROM stocks s
-            JOIN reports r ON r.stock_id = s.id
-            GROUP BY s.id, s.stock_code, s.stock_name;
-        """))
-    print("stock_summary 뷰 생성 완료")
+        indexed = conn.execute(text("SELECT COUNT(*) FROM report_search")).scalar()
+        total = conn.execute(text("SELECT COUNT(*) FROM reports")).scalar()
+    if indexed != total:
+        rebuild_search_index()
+
+def search_index_available() -> bool:
+    global _search_available
+    if _search_available is None:
+        with engine.connect() as conn:
+            _search_available = conn.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'report_search'")
+            ).first() is not None
+    return _search_available
+
+_SEARCH_INSERT_SQL = """
+    INSERT INTO report_search (rowid, stock_name, stock_code, broker_name, author_name, title)
+    SELECT r.id, s.stock_name, s.stock_code, COALESCE(b.name, ''), COALESCE(a.name, ''), r.title
+    FROM reports r
+    JOIN stocks s ON s.id = r.stock_id
+    LEFT JOIN brokers b ON b.id = r.broker_id
+    LEFT JOIN authors a ON a.id = r.author_id
+"""
+
+def sync_search_index(session, report_ids: list[int]):
+    """주어진 리포트들의 검색 인덱스 행을 현재 DB 값으로 다시 씀 (호출한 세션의 트랜잭션 안에서)"""
+    if not report_ids or not search_index_available():
+        return
+    for i in range(0, len(report_ids), 500):
+        chunk = report_ids[i:i + 500]
+        session.execute(
+            text("DELETE FROM report_search WHERE rowid IN :ids").bindparams(bindparam("ids", expanding=True)),
+            {"ids": chunk},
+        )
+        session.execute(
+            text(_SEARCH_INSERT_SQL + " WHERE r.id IN :ids").bindparams(bindparam("ids", expanding=True)),
+            {"ids": chunk},
+        )
+
+def rebuild_search_index():
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM report_search"))
+        conn.execute(text(_SEARCH_INSERT_SQL))
+    print("검색 인덱스 재생성 완료")
+
+def search_reports_query(q: str | None, columns: list[str] | None = None):
+    """
+    검색어에 맞는 (report_id, rank) select를 반환합니다. rank가 작을수록(bm25) 관련도가 높습니다.
+    인덱스를 쓸 수 없으면(미지원, 3글자 미만) None → 호출 측에서 LIKE로 대체
+    """
+    q = normalize_str(q)
+    if q is None or len(q) < SEARCH_MIN_LENGTH or not search_index_available():
+        return None
+
+    match = '"' + q.replace('"', '""') + '"'  # 구문(phrase) 검색으로 감싸서 FTS 문법 문자 무력화
+    if columns:
+        match = "{" + " ".join(columns) + "} : " + match
+
+    return (
+        select(report_search.c.rowid.label("report_id"), report_search.c.rank)
+        .where(text("report_search MATCH :match").bindparams(match=match))
+    )
+
+# ============================
+# 리포트 현재가/기대수익률
+# ============================
+# reports.current_price = 종목 현재가, expected_return = (목표가 - 현재가) / 현재가 * 100 (%)
+# 한 번의 UPDATE ... FROM으로 계산하고, 값이 이미 같은 행은 건드리지 않음 (현재가가 없는 종목은 그대로)
+_REPORT_RETURNS_SQL = """
+    UPDATE reports
+    SET current_price = s.current_price,
+        expected_return = CASE
+            WHEN reports.fair_price > 0
+            THEN (reports.fair_price - s.current_price) * 100.0 / s.current_price
+        END
+    FROM stocks s
+    WHERE s.id = reports.stock_id
+      AND s.current_price > 0
+      AND (reports.current_price IS NOT s.current_price
+           OR (reports.fair_price > 0 AND reports.expected_return IS NULL))
+"""
+
+def refresh_report_returns(session, stock_ids: list[int]) -> int:
+    """주어진 종목들의 리포트 현재가/기대수익률을 다시 계산하고 바뀐 행 수를 반환 (호출한 세션의 트랜잭션 안에서)"""
+    updated = 0
+    for i in range(0, len(stock_ids), 500):
+        result = session.execute(
+            text(_REPORT_RETURNS_SQL + " AND s.id IN :ids").bindparams(bindparam("ids", expanding=True)),
+            {"ids": stock_ids[i:i + 500]},
+        )
+        updated += result.rowcount
+    return updated
+
+
+# ============================
+# 종목 요약 테이블 (stock_summary)
+# ============================
+# current_price: 종목 현재가(주가 업데이트 값), 없으면 가장 최근 리포트의 현재가
+# main_rating: 가장 최근 리포트의 평가의견
+_SUMMARY_INSERT_SQL = """
+    INSERT INTO stock_summary (
+        stock_id, stock_code, stock_name, current_price,
+        avg_fair_price, avg_expected_return, main_rating, report_count
+    )
+    SELECT
+        s.id,
+        s.stock_code,
+        s.stock_name,
+        COALESCE(s.current_price, (
+            SELECT r2.current_price
+            FROM reports r2
+            WHERE r2.stock_id = s.id
+            ORDER BY r2.written_date DESC, r2.id DESC
+            LIMIT 1
+        )),
+        AVG(r.fair_price),
+        AVG(r.expected_return),
+        (
+            SELECT r3.rating_code
+            FROM reports r3
+            WHERE r3.stock_id = s.id
+            ORDER BY r3.written_date DESC, r3.id DESC
+            LIMIT 1
+        ),
+        COUNT(r.id)
+    FROM stocks s
+    JOIN reports r ON r.stock_id = s.id
+"""
+
+def refresh_stock_summary(session, stock_ids: list[int]):
+    """주어진 종목들의 요약 행만 다시 계산 (호출한 세션의 트랜잭션 안에서)"""
+    if not stock_ids:
+        return
+    for i in range(0, len(stock_ids), 500):
+        chunk = stock_ids[i:i + 500]
+        session.execute(
+            text("DELETE FROM stock_summary WHERE stock_id IN :ids").bindparams(bindparam("ids", expanding=True)),
+            {"ids": chunk},
+        )
+        session.execute(
+            text(_SUMMARY_INSERT_SQL + " WHERE s.id IN :ids GROUP BY s.id").bindparams(
+                bindparam("ids", expanding=True)
+            ),
+            {"ids": chunk},
+        )
+
+def rebuild_stock_summary():
+    """전체 리포트 기대수익률과 종목 요약을 처음부터 다시 계산 (초기화/복구용)"""
+    with engine.begin() as conn:
+        conn.execute(text(_REPORT_RETURNS_SQL))
+        conn.execute(text("DELETE FROM stock_summary"))
+        conn.execute(text(_SUMMARY_INSERT_SQL + " GROUP BY s.id"))
+        bump_data_version(conn)
+    print("stock_summary 테이블 생성 완료")
+
+
+# ============================
+# 데이터 버전 (응답 캐시 무효화용)
+# ============================
+# 스크래퍼/파이프라인은 별도 프로세스에서 실행되므로 메모리가 아닌 DB(meta 테이블)에 저장
+DATA_VERSION_KEY = "data_version"
+
+def bump_data_version(conn):
+    """
+    데이터 버전을 1 올립니다. 쓰기와 같은 트랜잭션(session 또는 connection)에서 호출해
+    커밋되는 순간 캐시가 무효화되도록 합니다.
+    """
+    conn.execute(
+        text("""
+            INSERT INTO meta (key, value) VALUES (:key, 1)
+            ON CONFLICT(key) DO UPDATE SET value = value + 1
+        """),
+        {"key": DATA_VERSION_KEY},
+    )
+
+def get_data_version() -> int:
+    with engine.connect() as conn:
+        value = conn.execute(
+            text("SELECT value FROM meta WHERE key = :key"), {"key": DATA_VERSION_KEY}
+        ).scalar()
+    return value or 0
 
 
 # ============================
@@ -383,7 +1108,7 @@ if __name__ == "__main__":
     init_db()
     # 네 CSV 파일 경로로 수정
     # load_csv_to_db("리포트_데이터_최종.csv", "pdf_summary_300files.csv")
-    create_stock_summary_view()
+    rebuild_stock_summary()
 
 # ============================
 # DB 조회 및 업데이트 (Pipeline용)
@@ -400,30 +1125,105 @@ def get_all_report_urls() -> list[str]:
     finally:
         session.close()
 
-def update_report_review(filename: str, summary: str, novice: str, expert: str):
+def update_report_reviews(reviews: list[dict], only_missing: bool = False) -> int:
     """
-    파일명(예: 12345.pdf)에서 ID를 추출하여 해당 리포트의 리뷰 내용을 업데이트합니다.
+    여러 리포트의 리뷰 내용을 한 트랜잭션으로 업데이트합니다. (report_idx 인덱스로 조회)
+    reviews: [{"report_idx": 644830 또는 "filename": "644830.pdf", "summary", "novice_content", "expert_content"}, ...]
+    only_missing: True면 아직 리뷰(summary)가 없는 리포트만 업데이트
+    반환: 업데이트된 리포트 수
     """
-    session = SessionLocal()
+    rows = []
+    for review in reviews:
+        report_idx = review.get("report_idx")
+        if report_idx is None:
+            report_idx = report_idx_from_filename(review.get("filename"))
+        if report_idx is None:
+            print(f"Invalid review target: {review.get('filename')}")
+            continue
+        rows.append({
+            "report_idx": int(report_idx),
+            "summary": review.get("summary"),
+            "novice_content": review.get("novice_content"),
+            "expert_content": review.get("expert_content"),
+        })
+    if not rows:
+        return 0
+
     try:
-        # filename: "644830.pdf" -> report_id: "644830"
-        report_id = filename.replace(".pdf", "")
-        
-        # attachment_url에 해당 ID가 포함된 리포트 찾기
-        # 예: https://.../report_idx=644830
-        report = session.query(Report).filter(Report.attachment_url.like(f"%{report_id}%")).first()
-        
-        if report:
-            report.summary = summary
-            report.novice_content = novice
-            report.expert_content = expert
-            session.commit()
-            print(f"Updated review for {filename}")
-        else:
-            print(f"Report not found for {filename}")
-            
+        return writer.write(_apply_reviews, rows, only_missing)
     except Exception as e:
-        session.rollback()
-        print(f"Error updating review for {filename}: {e}")
-    finally:
-        session.close()
+        print(f"Error updating reviews: {e}")
+        return 0
+
+def _apply_reviews(session, rows: list[dict], only_missing: bool = False) -> int:
+    result = session.execute(
+        text("""
+            UPDATE reports
+            SET summary = :summary, novice_content = :novice_content, expert_content = :expert_content
+            WHERE report_idx = :report_idx
+        """ + (" AND summary IS NULL" if only_missing else "")),
+        rows,
+    )
+    updated = result.rowcount
+
+    report_ids = []
+    idxs = [row["report_idx"] for row in rows]
+    for i in range(0, len(idxs), _IN_CHUNK):
+        report_ids += session.execute(
+            select(Report.id).where(Report.report_idx.in_(idxs[i:i + _IN_CHUNK]))
+        ).scalars().all()
+    sync_search_index(session, report_ids)
+    if updated:
+        bump_data_version(session)
+    return updated
+
+def save_reviews_by_report_id(reviews: dict[int, dict]) -> list[int]:
+    """
+    {report_id: 리뷰} 를 한 트랜잭션으로 반영하고 실제로 업데이트된 report_id 목록을 반환합니다. (파이프라인용)
+    쓰기 실패는 예외로 그대로 전달합니다.
+    """
+    if not reviews:
+        return []
+    rows = [
+        {"report_id": report_id, **{field: review.get(field) for field in ("summary", "novice_content", "expert_content")}}
+        for report_id, review in reviews.items()
+    ]
+    return writer.write(_apply_reviews_by_id, rows)
+
+def _apply_reviews_by_id(session, rows: list[dict]) -> list[int]:
+    # 같은 트랜잭션에서 존재하는 행만 골라 UPDATE (writer가 쓰기를 직렬화하므로 그 사이 삭제 없음)
+    ids = [row["report_id"] for row in rows]
+    existing = set()
+    for i in range(0, len(ids), _IN_CHUNK):
+        existing.update(session.execute(select(Report.id).where(Report.id.in_(ids[i:i + _IN_CHUNK]))).scalars())
+    rows = [row for row in rows if row["report_id"] in existing]
+    if not rows:
+        return []
+
+    session.execute(
+        text("""
+            UPDATE reports
+            SET summary = :summary, novice_content = :novice_content, expert_content = :expert_content
+            WHERE id = :report_id
+        """),
+        rows,
+    )
+    updated = [row["report_id"] for row in rows]
+    sync_search_index(session, updated)
+    bump_data_version(session)
+    return updated
+
+def update_report_review(filename: str, summary: str, novice: str, expert: str):
+    """
+    파일명(예: 12345.pdf)의 report_idx로 해당 리포트의 리뷰 내용을 업데이트합니다.
+    """
+    updated = update_report_reviews([{
+        "filename": filename,
+        "summary": summary,
+        "novice_content": novice,
+        "expert_content": expert,
+    }])
+    if updated:
+        print(f"Updated review for {filename}")
+    else:
+        print(f"Report not found for {filename}")
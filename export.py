@@ -0,0 +1,203 @@
+import argparse
+import csv
+import io
+import sys
+from datetime import date
+import orjson
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from db import SessionLocal, Report, Stock, Broker, Author
+from api import REPORT_FIELDS
+
+# ============================
+# 리포트 전체 내보내기 (CSV / NDJSON / Parquet)
+# ============================
+# 서버 측 커서(stream_results)로 EXPORT_CHUNK_SIZE행씩 읽어서 바로 쓰므로
+# 테이블 크기와 관계없이 메모리 사용량이 일정합니다. (Parquet는 청크마다 row group 하나)
+EXPORT_CHUNK_SIZE = 5000
+EXPORT_FORMATS = ("csv", "ndjson", "parquet")
+MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+def resolve_fields(fields: list[str] | None) -> list[str]:
+    if not fields:
+        return list(REPORT_FIELDS)
+    unknown = [name for name in fields if name not in REPORT_FIELDS]
+    if unknown:
+        raise ValueError(f"unknown fields: {', '.join(unknown)} (available: {', '.join(REPORT_FIELDS)})")
+    return list(dict.fromkeys(fields))
+
+
+def iter_report_chunks(fields: list[str], date_from: date | None = None, date_to: date | None = None,
+                       chunk_size: int = EXPORT_CHUNK_SIZE):
+    """리포트 행(튜플)을 chunk_size개씩 리스트로 반환 (written_date, id 순)"""
+    stmt = (
+        select(*(REPORT_FIELDS[name] for name in fields))
+        .select_from(Report)
+        .join(Stock, Report.stock_id == Stock.id)
+        .outerjoin(Broker, Report.broker_id == Broker.id)
+        .outerjoin(Author, Report.author_id == Author.id)
+        .order_by(Report.written_date, Report.id)
+    )
+    if date_from:
+        stmt = stmt.where(Report.written_date >= date_from)
+    if date_to:
+        stmt = stmt.where(Report.written_date <= date_to)
+
+    with SessionLocal() as session:
+        result = session.execute(stmt.execution_options(stream_results=True, yield_per=chunk_size))
+        for partition in result.partitions():
+            yield partition
+
+
+# ============================
+# 포맷별 인코더 (bytes 조각을 순서대로 반환)
+# ============================
+
+def iter_csv(fields: list[str], chunks):
+    buffer = io.StringIO()
+    out = csv.writer(buffer)
+    out.writerow(fields)
+    yield "\ufeff".encode("utf-8") + buffer.getvalue().encode("utf-8")  # 엑셀에서 한글이 깨지지 않도록 BOM
+    for rows in chunks:
+        buffer.seek(0)
+        buffer.truncate()
+        out.writerows(rows)
+        yield buffer.getvalue().encode("utf-8")
+
+
+def iter_ndjson(fields: list[str], chunks):
+    for rows in chunks:
+        yield b"".join(orjson.dumps(dict(zip(fields, row))) + b"\n" for row in rows)
+
+
+class _ChunkSink(io.RawIOBase):
+    """Parquet writer가 쓴 바이트를 모아 두었다가 꺼내 가는 출력 대상 (위치는 누적으로 유지)"""
+
+    def __init__(self):
+        self._chunks: list[bytes] = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _arrow_schema(fields: list[str]):
+    import pyarrow as pa
+
+    types = {int: pa.int64(), float: pa.float64(), date: pa.date32(), str: pa.string()}
+    return pa.schema([(name, types[REPORT_FIELDS[name].type.python_type]) for name in fields])
+
+
+def iter_parquet(fields: list[str], chunks):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Parquet 내보내기에는 pyarrow가 필요합니다 (pip install pyarrow)")
+
+    schema = _arrow_schema(fields)
+    sink = _ChunkSink()
+    with pq.ParquetWriter(sink, schema, compression="zstd") as writer:
+        for rows in chunks:
+            columns = list(zip(*rows)) if rows else [[] for _ in fields]
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array(values, type=field.type) for values, field in zip(columns, schema)], schema=schema
+            ))
+            yield sink.drain()
+    yield sink.drain()  # footer
+
+
+ENCODERS = {"csv": iter_csv, "ndjson": iter_ndjson, "parquet": iter_parquet}
+
+
+def iter_export(fmt: str, fields: list[str] | None = None, date_from: date | None = None,
+                date_to: date | None = None, chunk_size: int = EXPORT_CHUNK_SIZE):
+    if fmt not in ENCODERS:
+        raise ValueError(f"unknown format: {fmt} (available: {', '.join(EXPORT_FORMATS)})")
+    fields = resolve_fields(fields)
+    return ENCODERS[fmt](fields, iter_report_chunks(fields, date_from, date_to, chunk_size))
+
+
+# ============================
+# 엔드포인트 (/api/export)
+# ============================
+router = APIRouter(prefix="/api")
+
+
+@router.get("/export")
+def api_export(
+    fmt: str = Query("csv", alias="format", description="csv / ndjson / parquet"),
+    date_from: date | None = None,
+    date_to: date | None = None,
+    fields: str | None = Query(None, description="쉼표로 구분한 필드 목록 (기본: 전체)"),
+):
+    """리포트 전체(또는 기간)를 스트리밍으로 내려받기. 매일 증분은 date_from으로 조회"""
+    names = [name.strip() for name in fields.split(",") if name.strip()] if fields else None
+    if fmt == "parquet":
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise HTTPException(status_code=501, detail="pyarrow is not installed")
+    try:
+        body = iter_export(fmt, names, date_from, date_to)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    suffix = f"_{date_from or 'start'}_{date_to or 'end'}" if date_from or date_to else ""
+    filename = f"reports{suffix}.{fmt}"
+    return StreamingResponse(
+        body,
+        media_type=MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+# ============================
+# CLI
+# ============================
+
+def main():
+    parser = argparse.ArgumentParser(description="리포트 내보내기 (CSV / NDJSON / Parquet)")
+    parser.add_argument("--format", choices=EXPORT_FORMATS, default="csv")
+    parser.add_argument("--from", dest="date_from", type=date.fromisoformat, help="시작일 YYYY-MM-DD (포함)")
+    parser.add_argument("--to", dest="date_to", type=date.fromisoformat, help="종료일 YYYY-MM-DD (포함)")
+    parser.add_argument("--fields", help="쉼표로 구분한 필드 목록 (기본: 전체)")
+    parser.add_argument("--chunk-size", type=int, default=EXPORT_CHUNK_SIZE)
+    parser.add_argument("-o", "--output", help="출력 파일 (기본: 표준 출력)")
+    args = parser.parse_args()
+
+    fields = args.fields.split(",") if args.fields else None
+    body = iter_export(args.format, fields, args.date_from, args.date_to, args.chunk_size)
+    out = open(args.output, "wb") if args.output else sys.stdout.buffer
+    try:
+        size = 0
+        for data in body:
+            out.write(data)
+            size += len(data)
+    finally:
+        if args.output:
+            out.close()
+    print(f"내보내기 완료: {size:,} bytes", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
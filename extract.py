@@ -0,0 +1,91 @@
+import hashlib
+import mmap
+import os
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+
+# ============================
+# PDF 텍스트 추출 (프로세스 풀 + 내용 해시 캐시)
+# ============================
+# 추출한 텍스트는 PDF 내용의 sha256을 키로 cache/text/<앞 2자리>/<해시>.txt (UTF-8)에 저장
+# → 같은 PDF는 파일명이 달라도, 다시 실행해도 한 번만 파싱
+TEXT_CACHE_DIR = os.environ.get("TEXT_CACHE_DIR", "cache/text")
+EXTRACT_WORKERS = int(os.environ.get("EXTRACT_WORKERS", 0)) or os.cpu_count()
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def text_path(pdf_sha256: str) -> str:
+    return os.path.join(TEXT_CACHE_DIR, pdf_sha256[:2], f"{pdf_sha256}.txt")
+
+
+def _parse_pdf(pdf_path: str) -> str:
+    from pypdf import PdfReader  # 워커 프로세스에서만 필요
+
+    reader = PdfReader(pdf_path)
+    return "\n".join(page.extract_text() or "" for page in reader.pages)
+
+
+def _extract_one(pdf_path: str) -> tuple[str | None, str | None]:
+    """워커 프로세스에서 실행: (pdf 해시, 오류 메시지)"""
+    try:
+        pdf_sha256 = file_sha256(pdf_path)
+        out_path = text_path(pdf_sha256)
+        if os.path.exists(out_path):
+            return pdf_sha256, None
+
+        content = _parse_pdf(pdf_path)
+        os.makedirs(os.path.dirname(out_path), exist_ok=True)
+        tmp_path = f"{out_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(content)
+        os.replace(tmp_path, out_path)  # 다른 워커와 동시에 써도 완성된 파일만 보임
+        return pdf_sha256, None
+    except Exception as e:
+        return None, f"{type(e).__name__}: {e}"
+
+
+def extract_texts(pdf_paths: list[str], workers: int = EXTRACT_WORKERS) -> dict[str, tuple[str | None, str | None]]:
+    """
+    PDF 여러 개의 텍스트를 CPU 코어 수만큼 프로세스로 나눠 추출합니다.
+    반환: {pdf 경로: (pdf 해시, 오류 메시지)} — 성공하면 오류 None, 실패하면 해시 None
+    """
+    if not pdf_paths:
+        return {}
+    with ProcessPoolExecutor(max_workers=min(workers, len(pdf_paths))) as pool:
+        results = pool.map(_extract_one, pdf_paths, chunksize=max(1, len(pdf_paths) // (workers * 4)))
+        return dict(zip(pdf_paths, results))
+
+
+# ============================
+# 추출 텍스트 읽기 (이후 단계용)
+# ============================
+
+@contextmanager
+def open_text(pdf_sha256: str):
+    """추출 텍스트를 메모리 맵(UTF-8 bytes)으로 엽니다. 빈 텍스트는 b""."""
+    with open(text_path(pdf_sha256), "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield b""
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            yield mapped
+
+
+def iter_text(pdf_sha256: str, chunk_chars: int = 64 * 1024):
+    """추출 텍스트를 chunk_chars 글자씩 나눠 읽음 (전체를 메모리에 올리지 않음)"""
+    with open(text_path(pdf_sha256), encoding="utf-8") as f:
+        for chunk in iter(lambda: f.read(chunk_chars), ""):
+            yield chunk
+
+
+def read_text(pdf_sha256: str) -> str:
+    with open(text_path(pdf_sha256), encoding="utf-8") as f:
+        return f.read()
@@ -1,47 +1,133 @@
-import requests
+import asyncio
+import json
 import os
-import time
+from datetime import datetime
+import httpx
+from throttle import TokenBucket, backoff_delay
+from db import parse_report_idx
 
-def download_pdfs(report_urls):
-    if not os.path.exists("pdf"):
-        os.makedirs("pdf")
+PDF_DIR = "pdf"
+MANIFEST_DIR = os.path.join(PDF_DIR, "manifests")
 
-    # 1. 헤더 설정 (브라우저인 척 속임수)
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+# 1. 헤더 설정 (브라우저인 척 속임수)
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+}
+
+# 다운로드 설정
+CONCURRENCY = 4        # 동시에 받는 파일 수
+RATE = 1.0             # 초당 요청 수 (전체, 서버 부하 방지 및 차단 예방)
+MAX_RETRIES = 4        # 파일당 재시도 횟수
+MIN_PDF_SIZE = 1000    # 이보다 작으면 유효하지 않은 파일로 간주 (가끔 빈 파일이 올 수 있음)
+CHUNK_SIZE = 64 * 1024
+TIMEOUT = 60.0
+
+
+def pdf_path(url: str) -> str:
+    report_idx = parse_report_idx(url)
+    name = report_idx if report_idx is not None else url.split("=")[-1]
+    return os.path.join(PDF_DIR, f"{name}.pdf")
+
+
+class _RetryableError(Exception):
+    pass
+
+
+async def _download_one(client: httpx.AsyncClient, url: str, path: str, limiter: TokenBucket) -> int:
+    """
+    url을 path.part로 스트리밍 저장한 뒤 path로 원자적 이동. 저장한 바이트 수 반환.
+    이전 실행에서 남은 .part가 있으면 Range 요청으로 이어 받습니다.
+    """
+    part_path = path + ".part"
+    offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+    headers = {"Range": f"bytes={offset}-"} if offset else {}
+
+    await limiter.acquire()
+    async with client.stream("GET", url, headers=headers) as response:
+        if response.status_code == 429 or response.status_code >= 500:
+            raise _RetryableError(f"Status Code: {response.status_code}")
+        if response.status_code == 416:  # 이어 받을 범위가 없음 → 처음부터
+            os.remove(part_path)
+            raise _RetryableError("Status Code: 416")
+        if response.status_code not in (200, 206):
+            raise ValueError(f"Status Code: {response.status_code}")
+
+        mode = "ab" if response.status_code == 206 else "wb"  # 서버가 Range를 무시하면 처음부터
+        with open(part_path, mode) as f:
+            async for chunk in response.aiter_bytes(CHUNK_SIZE):
+                f.write(chunk)
+
+    size = os.path.getsize(part_path)
+    if size <= MIN_PDF_SIZE:
+        os.remove(part_path)
+        raise ValueError("유효하지 않은 파일")
+    os.replace(part_path, path)
+    return size
+
+
+async def download_pdfs_async(report_urls, concurrency: int = CONCURRENCY, rate: float = RATE,
+                              max_retries: int = MAX_RETRIES) -> dict:
+    """
+    PDF를 동시에(concurrency개) 내려받습니다. 전체 요청 속도는 rate(초당)로 제한하고,
+    이미 pdf/에 있는 파일은 건너뛰며, 연결 오류/429/5xx는 백오프 후 재시도합니다.
+    실행 결과(성공/건너뜀/실패)를 manifest로 반환하고 pdf/manifests/에 저장합니다.
+    """
+    os.makedirs(PDF_DIR, exist_ok=True)
+    urls = list(dict.fromkeys(url for url in report_urls if url))  # None/빈 문자열 제외, 중복 제거
+
+    manifest = {
+        "started_at": datetime.now().isoformat(timespec="seconds"),
+        "downloaded": [],
+        "skipped": [],
+        "failed": [],
     }
+    limiter = TokenBucket(rate, burst=concurrency)
+    semaphore = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(headers=HEADERS, limits=limits, timeout=TIMEOUT, follow_redirects=True) as client:
+        async def download(i: int, url: str):
+            path = pdf_path(url)
+            if os.path.exists(path):
+                manifest["skipped"].append({"url": url, "path": path})
+                return
+
+            async with semaphore:
+                for attempt in range(max_retries + 1):
+                    try:
+                        size = await _download_one(client, url, path, limiter)
+                        manifest["downloaded"].append({"url": url, "path": path, "bytes": size})
+                        print(f"다운로드 성공: {i} ({url})")
+                        return
+                    except (_RetryableError, httpx.TransportError) as e:
+                        error = repr(e) if isinstance(e, httpx.TransportError) else str(e)
+                    except Exception as e:
+                        error = str(e)
+                        break  # 재시도해도 소용없는 오류 (404, 빈 파일 등)
+
+                    if attempt < max_retries:
+                        await asyncio.sleep(backoff_delay(attempt))
+
+            manifest["failed"].append({"url": url, "path": path, "error": error})
+            print(f"다운로드 실패: {i} ({url}) {error}")
+
+        await asyncio.gather(*(download(i, url) for i, url in enumerate(urls)))
+
+    manifest["finished_at"] = datetime.now().isoformat(timespec="seconds")
+    _write_manifest(manifest)
+    print(
+        f"다운로드 {len(manifest['downloaded'])}건, 건너뜀 {len(manifest['skipped'])}건, "
+        f"실패 {len(manifest['failed'])}건"
+    )
+    return manifest
+
+
+def _write_manifest(manifest: dict):
+    os.makedirs(MANIFEST_DIR, exist_ok=True)
+    name = manifest["started_at"].replace(":", "").replace("-", "")
+    with open(os.path.join(MANIFEST_DIR, f"{name}.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
 
-    i = 0
-    # 3. 연속 다운로드 실행
-    for url in report_urls:
-        if not url: # None or empty string check
-            continue
-            
-        tmp = url.split("=")[-1]
-        file_path = f"pdf/{tmp}.pdf"
-
-        try:
-            print(f"다운로드 시작: {i} ({url})...", end=" ")
-            
-            # 요청 보내기
-            response = requests.get(url, headers=headers)
-            
-            # 응답 코드가 200(성공)일 때만 저장
-            if response.status_code == 200:
-                # 내용(content)이 비어있지 않은지 확인 (가끔 빈 파일이 올 수 있음)
-                if len(response.content) > 1000: 
-                    with open(file_path, "wb") as f:
-                        f.write(response.content)
-                    print("성공!")
-                else:
-                    print("실패 (유효하지 않은 파일)")
-            else:
-                print(f"실패 (Status Code: {response.status_code})")
-
-        except Exception as e:
-            print(f"에러 발생: {e}")
-        i += 1
-
-        # **중요** 서버 부하 방지 및 차단 예방을 위해 2초 대기
-        time.sleep(2)
 
+def download_pdfs(report_urls, **kwargs) -> dict:
+    return asyncio.run(download_pdfs_async(report_urls, **kwargs))
@@ -1,4 +1,4 @@
-from db import init_db, load_csv_to_db, create_stock_summary_view
+from db import init_db, load_csv_to_db, rebuild_stock_summary
 
 def main():
     print("Initializing database...")
@@ -7,8 +7,8 @@ def main():
     print("Loading data from CSV... (SKIPPED - Data is loaded via scraper.py)")
     # load_csv_to_db("리포트_데이터_최종.csv", "pdf_summary_300files.csv")
     
-    print("Creating stock summary view...")
-    create_stock_summary_view()
+    print("Building stock summary table...")
+    rebuild_stock_summary()
     
     print("Data initialization complete.")
 
@@ -0,0 +1,111 @@
+import os
+from datetime import datetime
+from sqlalchemy import text, bindparam
+from db import SessionLocal, writer
+
+# ============================
+# 파이프라인 작업 상태 (report_jobs)
+# ============================
+# stage는 리포트별로 마지막으로 완료한 단계. 다음 단계가 실패하면 stage는 그대로 두고
+# attempts/last_error만 기록하므로, 다음 실행에서 같은 단계부터 다시 시도합니다.
+# 상태 변경은 모두 단일 writer(db.writer)를 거쳐 다른 쓰기와 순서대로 커밋됩니다.
+STAGES = ("scraped", "downloaded", "extracted", "reviewed")
+MAX_ATTEMPTS = int(os.environ.get("PIPELINE_MAX_ATTEMPTS", 3))  # 이 횟수만큼 실패하면 더 이상 시도하지 않음
+
+
+def enqueue_new_reports() -> int:
+    """작업 상태가 없는 리포트(마지막 작업 이후 새로 적재된 리포트)를 scraped 단계로 등록"""
+    def enqueue(session):
+        now = datetime.now()
+        result = session.execute(
+            text("""
+                INSERT INTO report_jobs (report_id, stage, attempts, scraped_at, updated_at)
+                SELECT r.id, 'scraped', 0, :now, :now
+                FROM reports r
+                WHERE r.id > (SELECT COALESCE(MAX(report_id), 0) FROM report_jobs)
+                  AND r.attachment_url IS NOT NULL
+            """),
+            {"now": now},
+        )
+        return result.rowcount
+
+    return writer.write(enqueue)
+
+
+def pending(stage: str, limit: int, after_id: int = 0) -> list:
+    """
+    stage를 진행할 리포트 목록 (이전 단계까지 완료, 실패 MAX_ATTEMPTS회 미만).
+    report_id 순으로 after_id 다음부터 limit개: (report_id, report_idx, attachment_url, pdf_sha256)
+    """
+    previous = STAGES[STAGES.index(stage) - 1]
+    with SessionLocal() as session:
+        return session.execute(
+            text("""
+                SELECT j.report_id, r.report_idx, r.attachment_url, j.pdf_sha256
+                FROM report_jobs j
+                JOIN reports r ON r.id = j.report_id
+                WHERE j.stage = :previous AND j.attempts < :max_attempts AND j.report_id > :after_id
+                ORDER BY j.report_id
+                LIMIT :limit
+            """),
+            {"previous": previous, "max_attempts": MAX_ATTEMPTS, "after_id": after_id, "limit": limit},
+        ).all()
+
+
+def mark_done(stage: str, report_ids: list[int]):
+    if not report_ids:
+        return
+    if stage not in STAGES:
+        raise ValueError(f"unknown stage: {stage}")
+    column = f"{stage}_at"
+
+    def mark(session):
+        now = datetime.now()
+        session.execute(
+            text(f"""
+                UPDATE report_jobs
+                SET stage = :stage, {column} = :now, updated_at = :now, attempts = 0, last_error = NULL
+                WHERE report_id IN :ids
+            """).bindparams(bindparam("ids", expanding=True)),
+            {"stage": stage, "now": now, "ids": report_ids},
+        )
+
+    writer.write(mark)
+
+
+def record_pdf_hashes(hashes: dict[int, str]):
+    """hashes: {report_id: PDF 내용 sha256}"""
+    if not hashes:
+        return
+    writer.write(lambda session: session.execute(
+        text("UPDATE report_jobs SET pdf_sha256 = :pdf_sha256 WHERE report_id = :report_id"),
+        [{"report_id": report_id, "pdf_sha256": h} for report_id, h in hashes.items()],
+    ))
+
+
+def mark_failed(stage: str, errors: dict[int, str]):
+    """errors: {report_id: 오류 메시지}"""
+    if not errors:
+        return
+
+    def fail(session):
+        now = datetime.now()
+        session.execute(
+            text("""
+                UPDATE report_jobs
+                SET attempts = attempts + 1, last_error = :error, updated_at = :now
+                WHERE report_id = :report_id
+            """),
+            [
+                {"report_id": report_id, "error": f"{stage}: {error}", "now": now}
+                for report_id, error in errors.items()
+            ],
+        )
+
+    writer.write(fail)
+
+
+def stage_counts() -> dict[str, int]:
+    with SessionLocal() as session:
+        rows = session.execute(text("SELECT stage, COUNT(*) FROM report_jobs GROUP BY stage")).all()
+    return {stage: count for stage, count in rows}
@@ -0,0 +1,64 @@
+import os
+import time
+import pandas as pd
+import FinanceDataReader as fdr
+
+# ============================
+# KRX 종목 목록 (지연 로드 + 디스크 캐시)
+# ============================
+LISTING_CACHE_PATH = os.environ.get("KRX_LISTING_CACHE", "cache/krx_listing.pkl")
+LISTING_TTL = 24 * 60 * 60  # 디스크 캐시 유효 시간(초)
+
+_listing: pd.DataFrame | None = None
+_listing_loaded_at = 0.0
+_listing_stale = False  # 조회 실패로 기한이 지난 디스크 캐시를 올려 둔 상태 (allow_stale=False 호출은 쓰지 않음)
+
+
+def _fetch_listing() -> pd.DataFrame:
+    listing = fdr.StockListing('KRX')  # 코스피, 코스닥, 코넥스 전체
+    listing['Code'] = listing['Code'].astype(str)
+    return listing
+
+
+def _write_cache(listing: pd.DataFrame, cache_path: str):
+    os.makedirs(os.path.dirname(cache_path) or ".", exist_ok=True)
+    tmp_path = cache_path + ".tmp"
+    listing.to_pickle(tmp_path)
+    os.replace(tmp_path, cache_path)  # 쓰는 도중 읽혀도 깨진 파일이 보이지 않게
+
+
+def get_stock_listing(max_age: float = LISTING_TTL, cache_path: str = LISTING_CACHE_PATH,
+                      allow_stale: bool = True) -> pd.DataFrame:
+    """
+    KRX 전체 종목 목록(Code, Name, Close 등)을 반환합니다.
+    처음 호출될 때 로드하며 메모리 → 디스크 캐시(max_age초 이내) → 네트워크 순으로 찾습니다.
+    네트워크 조회가 실패하면(오프라인 등) 기한이 지난 디스크 캐시라도 사용합니다. (allow_stale=False면 예외)
+    """
+    global _listing, _listing_loaded_at, _listing_stale
+
+    now = time.time()
+    if _listing is not None and now - _listing_loaded_at <= max_age and (allow_stale or not _listing_stale):
+        return _listing
+
+    if os.path.exists(cache_path):
+        cached_at = os.path.getmtime(cache_path)
+        if now - cached_at <= max_age:
+            _listing, _listing_loaded_at, _listing_stale = pd.read_pickle(cache_path), cached_at, False
+            return _listing
+
+    try:
+        listing = _fetch_listing()
+    except Exception as e:
+        if not allow_stale or not os.path.exists(cache_path):
+            raise
+        print(f"종목 목록 조회 실패, 디스크 캐시 사용: {e}")
+        # 같은 프로세스에서 실패한 조회를 반복하지 않도록 메모리 캐시 시각은 지금으로 두고 stale로 표시
+        _listing, _listing_loaded_at, _listing_stale = pd.read_pickle(cache_path), now, True
+        return _listing
+
+    try:
+        _write_cache(listing, cache_path)
+    except OSError as e:
+        print(f"종목 목록 캐시 저장 실패: {e}")
+    _listing, _listing_loaded_at, _listing_stale = listing, now, False
+    return _listing
@@ -1,40 +1,69 @@
-from contextlib import asynccontextmanager
-from fastapi import FastAPI, Request, Depends
+import asyncio
+import itertools
+import os
+from contextlib import asynccontextmanager, suppress
+from fastapi import FastAPI, Request
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from fastapi.responses import HTMLResponse
-from sqlalchemy.orm import Session
-from sqlalchemy import or_, text
-from db import SessionLocal, Report, Stock, Broker, Author, init_db
-from services import update_stock_prices
+from fastapi.responses import HTMLResponse, PlainTextResponse, StreamingResponse
+from fastapi.middleware.gzip import GZipMiddleware
+from sqlalchemy.orm import Session, contains_eager
+from sqlalchemy import or_, text, tuple_, select
+from db import (
+    SessionLocal, Report, Stock, Broker, Author, init_db, search_reports_query, writer, iterate_in_db_thread,
+    DB_POOL_SIZE,
+)
+from services import run_price_refresher
+from cache import response_cache
+from api import router as api_router, encode_cursor, decode_cursor
+from export import router as export_router
+from accuracy import get_leaderboard
+from metrics import MetricsMiddleware, instrument_templates, render_metrics
 
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     init_db()
-    try:
-        # 주가 업데이트 실행
-        update_stock_prices()
-    except Exception as e:
-        print(f"Startup Error: {e}")
+    # 주가 업데이트는 백그라운드에서 주기적으로 실행 (서버는 바로 요청 처리 시작)
+    price_task = asyncio.create_task(run_price_refresher())
     yield
+    price_task.cancel()
+    with suppress(asyncio.CancelledError):
+        await price_task
+    # 큐에 남은 쓰기를 마치고 writer 스레드 종료
+    await asyncio.to_thread(writer.stop)
 
 app = FastAPI(lifespan=lifespan)
+# 1KB 이상 응답은 gzip 압축 (JSON API, 큰 HTML 페이지)
+app.add_middleware(GZipMiddleware, minimum_size=1000)
+# 라우트별 지연 시간/요청당 쿼리 수 기록 (가장 바깥에서 측정하도록 마지막에 추가)
+app.add_middleware(MetricsMiddleware)
+app.include_router(api_router)
+app.include_router(export_router)
 
 # 1. Static directory mount
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
 # 2. Jinja2 Templates configuration
 templates = Jinja2Templates(directory="templates")
+instrument_templates(templates)
 
-# Dependency to get DB session
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+# /data.html 페이지 크기 (limit 파라미터는 MAX_PAGE_SIZE로 제한)
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+# /data.html?stream=1: 페이지 없이 검색 결과 전체를 스트리밍 (최대 행 수, 0이면 제한 없음)
+STREAM_MAX_ROWS = int(os.environ.get("DATA_STREAM_MAX_ROWS", 10000))
+STREAM_YIELD_PER = 200  # DB에서 한 번에 가져오는 행 수
+STREAM_FLUSH_SIZE = 16 * 1024  # 이 글자 수만큼 모이면 내보냄
+# 스트리밍 응답은 끝날 때까지 DB 연결 하나를 잡고 있으므로 동시 스트림 수를 풀 크기보다 작게 제한 (초과 시 503)
+STREAM_MAX_CONCURRENT = int(os.environ.get("DATA_STREAM_MAX_CONCURRENT", max(1, DB_POOL_SIZE // 4)))
+_stream_slots = asyncio.Semaphore(STREAM_MAX_CONCURRENT)
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def read_metrics():
+    # Prometheus 텍스트 형식
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
 
 @app.get("/api/items/{item_id}")
 def read_item(item_id: int, q: str | None = None):
@@ -55,39 +84,180 @@ async def read_card(request: Request):
     return templates.TemplateResponse("card.html", {"request": request})
 
 @app.get("/data.html", response_class=HTMLResponse)
-async def read_data(request: Request, q: str | None = None, db: Session = Depends(get_db)):
-    if q is None:
-        q = "삼성전자"
+async def read_data(
+    request: Request,
+    q: str | None = None,
+    cursor: str | None = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    stream: bool = False,
+):
+    if stream:
+        # 결과 전체를 읽는 동안 조금씩 렌더링해서 보냄 (캐시하지 않음)
+        if _stream_slots.locked():
+            return PlainTextResponse("too many streaming requests", status_code=503, headers={"Retry-After": "5"})
+        await _stream_slots.acquire()
+        chunks = _release_when_done(iterate_in_db_thread(stream_data(request, q)))
+        return StreamingResponse(chunks, media_type="text/html; charset=utf-8")
+    # 같은 검색어/페이지는 데이터가 바뀌기 전까지 캐시된 HTML로 응답
+    # 조회/렌더링은 DB 스레드 풀에서 실행 (이벤트 루프를 막지 않음)
+    return await response_cache.serve(request, lambda: render_data(request, q, cursor, limit))
 
-    query = db.query(Report).join(Report.stock).outerjoin(Report.broker).outerjoin(Report.author)
+def render_data(request: Request, q: str | None, cursor: str | None, limit: int):
+    with SessionLocal() as db:
+        return _render_data(request, q, cursor, limit, db)
+
+def data_query(db: Session, q: str):
+    # stock/broker/author는 이미 조인하므로 같은 조인으로 채워서 행마다 lazy load가 일어나지 않게 함
+    query = (
+        db.query(Report)
+        .join(Report.stock)
+        .outerjoin(Report.broker)
+        .outerjoin(Report.author)
+        .options(
+            contains_eager(Report.stock),
+            contains_eager(Report.broker),
+            contains_eager(Report.author),
+        )
+    )
     
     if q:
-        search_term = f"%{q}%"
-        query = query.filter(
-            or_(
-                Stock.stock_name.like(search_term),
-                Broker.name.like(search_term),
-                Author.name.like(search_term)
+        # 전문 검색 인덱스 우선, 사용할 수 없으면(짧은 검색어 등) LIKE 검색
+        # 목록은 키셋 페이지네이션을 위해 날짜순 유지 (관련도 순위는 query.py 검색에서 사용)
+        matched = search_reports_query(q)
+        if matched is not None:
+            matched = matched.subquery()
+            query = query.filter(Report.id.in_(select(matched.c.report_id)))
+        else:
+            search_term = f"%{q}%"
+            query = query.filter(
+                or_(
+                    Stock.stock_name.like(search_term),
+                    Broker.name.like(search_term),
+                    Author.name.like(search_term)
+                )
             )
-        )
-    
-    reports = query.order_by(Report.written_date.desc()).all()
+    return query.order_by(Report.written_date.desc(), Report.id.desc())
+
+def _render_data(request: Request, q: str | None, cursor: str | None, limit: int, db: Session):
+    if q is None:
+        q = "삼성전자"
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    query = data_query(db, q)
+
+    # 키셋 페이지네이션: 직전 페이지 마지막 행보다 (written_date, id)가 작은 행부터
+    position = decode_cursor(cursor)
+    if position:
+        query = query.filter(tuple_(Report.written_date, Report.id) < position)
+
+    # 다음 페이지 존재 여부 확인을 위해 1건 더 조회
+    reports = query.limit(limit + 1).all()
+    next_cursor = encode_cursor(reports[limit - 1].written_date, reports[limit - 1].id) if len(reports) > limit else None
+    reports = reports[:limit]
     
-    return templates.TemplateResponse("data.html", {"request": request, "reports": reports, "q": q})
+    return templates.TemplateResponse(
+        "data.html",
+        {
+            "request": request,
+            "reports": reports,
+            "header_stock": reports[0].stock if reports else None,
+            "q": q,
+            "cursor": cursor,
+            "limit": limit,
+            "next_cursor": next_cursor,
+        },
+    )
+
+async def _release_when_done(chunks):
+    """스트림이 끝나거나 중단되면 동시 스트림 슬롯을 반환"""
+    try:
+        async for chunk in chunks:
+            yield chunk
+    finally:
+        try:
+            await chunks.aclose()  # 세션(연결)을 먼저 닫고 슬롯 반환
+        finally:
+            _stream_slots.release()
+
+def stream_data(request: Request, q: str | None):
+    """
+    data.html을 Jinja generate()로 조금씩 렌더링하는 generator.
+    리포트는 yield_per로 STREAM_YIELD_PER행씩만 읽으므로 결과가 많아도 메모리가 일정합니다.
+    """
+    if q is None:
+        q = "삼성전자"
+    with SessionLocal() as db:
+        query = data_query(db, q)
+        if STREAM_MAX_ROWS > 0:
+            query = query.limit(STREAM_MAX_ROWS)
+        reports = iter(query.yield_per(STREAM_YIELD_PER))
+        # 제목에 쓸 첫 행만 미리 꺼내고 나머지는 렌더링하면서 읽음
+        first = next(reports, None)
+        if first is not None:
+            reports = itertools.chain([first], reports)
+
+        template = templates.get_template("data.html")
+        context = {
+            "request": request,
+            "reports": reports,
+            "header_stock": first.stock if first is not None else None,
+            "q": q,
+            "cursor": None,
+            "limit": None,
+            "next_cursor": None,
+            "stream": True,
+        }
+        buffer, size = [], 0
+        for part in template.generate(context):
+            buffer.append(part)
+            size += len(part)
+            if size >= STREAM_FLUSH_SIZE:
+                yield "".join(buffer).encode("utf-8")
+                buffer, size = [], 0
+        if buffer:
+            yield "".join(buffer).encode("utf-8")
 
 @app.get("/statistic.html", response_class=HTMLResponse)
-async def read_statistic(request: Request, db: Session = Depends(get_db)):
+async def read_statistic(request: Request):
+    return await response_cache.serve(request, lambda: render_statistic(request))
+
+def render_statistic(request: Request):
+    with SessionLocal() as db:
+        return _render_statistic(request, db)
+
+def _render_statistic(request: Request, db: Session):
     try:
-        # DB View 조회
-        # stock_summary 뷰: stock_code, stock_name, current_price, avg_fair_price, avg_expected_return, main_rating
-        result = db.execute(text("SELECT * FROM stock_summary ORDER BY avg_expected_return DESC LIMIT 30"))
+        # stock_summary 집계 테이블 조회 (avg_expected_return 인덱스로 상위 N개만 읽음)
+        result = db.execute(text("""
+            SELECT stock_code, stock_name, current_price, avg_fair_price, avg_expected_return, main_rating
+            FROM stock_summary
+            ORDER BY avg_expected_return DESC
+            LIMIT 30
+        """))
         top_30 = result.mappings().all()
     except Exception as e:
+        # 빈 표를 503으로 반환 (200이 아니므로 응답 캐시에 저장되지 않고 다음 요청에서 다시 조회)
         print(f"Error reading statistic from DB: {e}")
-        top_30 = []
+        return templates.TemplateResponse("statistic.html", {"request": request, "stocks": []}, status_code=503)
 
     return templates.TemplateResponse("statistic.html", {"request": request, "stocks": top_30})
 
+@app.get("/leaderboard.html", response_class=HTMLResponse)
+async def read_leaderboard(request: Request):
+    return await response_cache.serve(request, lambda: render_leaderboard(request))
+
+def render_leaderboard(request: Request):
+    # author_accuracy / broker_accuracy 집계 테이블 조회 (python accuracy.py로 갱신)
+    with SessionLocal() as db:
+        try:
+            board = get_leaderboard(db)
+        except Exception as e:
+            # 빈 표를 503으로 반환 (응답 캐시에 저장되지 않음)
+            print(f"Error reading leaderboard from DB: {e}")
+            return templates.TemplateResponse(
+                "leaderboard.html", {"request": request, "authors": [], "brokers": []}, status_code=503
+            )
+    return templates.TemplateResponse("leaderboard.html", {"request": request, **board})
+
 @app.get("/signin.html", response_class=HTMLResponse)
 async def read_signin(request: Request):
     return templates.TemplateResponse("signin.html", {"request": request})
@@ -0,0 +1,229 @@
+import bisect
+import os
+import threading
+import time
+from contextvars import ContextVar
+import jinja2
+from sqlalchemy import event
+
+# ============================
+# 성능 지표 수집 (Prometheus 텍스트 형식, /metrics)
+# ============================
+# - MetricsMiddleware: 라우트별 요청 수/지연 시간, 요청당 SQL 실행 수/시간 (N+1 쿼리 확인용)
+# - instrument_engine: SQLAlchemy cursor 실행 훅으로 쿼리 수/시간 집계, 느린 쿼리 로그
+# - TimedTemplate: Jinja 템플릿 렌더링 시간
+# 요청별 집계는 contextvar로 전달 (DB 스레드 풀은 run_in_db_thread가 contextvars를 복사하므로 같이 집계됨)
+SLOW_QUERY_MS = float(os.environ.get("SLOW_QUERY_MS", 0))  # 0보다 크면 이 시간(ms) 이상 걸린 쿼리를 출력
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+
+# ============================
+# 지표 타입
+# ============================
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, labels: tuple = ()):
+        self.name, self.help_text, self.labels = name, help_text, labels
+        self._values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount: float = 1.0):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0.0) + amount
+
+    def collect(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for label_values, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labels, label_values)} {value:g}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, labels: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        self.name, self.help_text, self.labels = name, help_text, labels
+        self.buckets = tuple(sorted(buckets))
+        # 라벨 값 → [버킷별 개수(누적 아님)..., +Inf 개수, 합계]
+        self._series: dict[tuple, list[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0.0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    def collect(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = {key: list(series) for key, series in self._series.items()}
+        for label_values, series in sorted(snapshot.items()):
+            cumulative = 0.0
+            for bound, count in zip(self.buckets + (float("inf"),), series[:-1]):
+                cumulative += count
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{bound:g}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, label_values, le)} {cumulative:g}")
+            labels = _format_labels(self.labels, label_values)
+            lines.append(f"{self.name}_sum{labels} {series[-1]:.6f}")
+            lines.append(f"{self.name}_count{labels} {cumulative:g}")
+        return lines
+
+
+# ============================
+# 지표 목록
+# ============================
+HTTP_REQUESTS = Counter("http_requests_total", "HTTP requests", ("method", "route", "status"))
+HTTP_LATENCY = Histogram("http_request_duration_seconds", "HTTP request latency", ("method", "route"))
+HTTP_QUERIES = Histogram("http_request_db_queries", "SQL statements executed per request", ("route",), COUNT_BUCKETS)
+HTTP_DB_TIME = Histogram("http_request_db_seconds", "Time spent in SQL per request", ("route",))
+DB_QUERIES = Counter("db_queries_total", "SQL statements executed", ("operation",))
+DB_LATENCY = Histogram("db_query_duration_seconds", "SQL statement latency", ("operation",), QUERY_BUCKETS)
+DB_SLOW_QUERIES = Counter("db_slow_queries_total", "SQL statements slower than SLOW_QUERY_MS", ("operation",))
+TEMPLATE_RENDER = Histogram("template_render_seconds", "Jinja template render time", ("template",))
+
+METRICS = [HTTP_REQUESTS, HTTP_LATENCY, HTTP_QUERIES, HTTP_DB_TIME, DB_QUERIES, DB_LATENCY, DB_SLOW_QUERIES,
+           TEMPLATE_RENDER]
+_collectors = []  # 추가 지표를 만드는 함수 (모듈 밖 상태: 응답 캐시 등)
+
+
+def register_collector(func):
+    """func() -> Prometheus 텍스트 줄 목록. /metrics 출력 시 호출"""
+    _collectors.append(func)
+    return func
+
+
+def render_metrics() -> str:
+    lines = []
+    for metric in METRICS:
+        lines += metric.collect()
+    for collector in _collectors:
+        try:
+            lines += collector()
+        except Exception as e:
+            print(f"지표 수집 실패: {e}")
+    return "\n".join(lines) + "\n"
+
+
+# ============================
+# 요청별 집계 (contextvar)
+# ============================
+_request_stats: ContextVar[dict | None] = ContextVar("request_stats", default=None)
+
+
+def _route_label(scope: dict) -> str:
+    # 경로 그대로 쓰면 /data.html?… 외에도 임의 경로마다 시계열이 생기므로 라우트 템플릿으로 묶음
+    route = scope.get("route")
+    if route is not None and getattr(route, "path", None):
+        return route.path
+    if scope.get("root_path") and scope.get("endpoint") is not None:
+        return scope["root_path"]  # 마운트 (/static)
+    return "unmatched"
+
+
+class MetricsMiddleware:
+    """라우트별 요청 수/지연 시간과 요청당 SQL 실행 수/시간을 기록하는 ASGI 미들웨어"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = {"queries": 0, "db_seconds": 0.0}
+        token = _request_stats.set(stats)
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            _request_stats.reset(token)
+            route = _route_label(scope)
+            method = scope.get("method", "")
+            HTTP_REQUESTS.inc(method, route, status["code"])
+            HTTP_LATENCY.observe(elapsed, method, route)
+            HTTP_QUERIES.observe(stats["queries"], route)
+            HTTP_DB_TIME.observe(stats["db_seconds"], route)
+
+
+# ============================
+# SQL 실행 훅
+# ============================
+
+def _operation(statement: str) -> str:
+    word = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ""
+    return word if word in ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH", "PRAGMA") else "OTHER"
+
+
+def instrument_engine(engine, slow_query_ms: float = SLOW_QUERY_MS):
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_started"].pop()
+        operation = _operation(statement)
+        DB_QUERIES.inc(operation)
+        DB_LATENCY.observe(elapsed, operation)
+
+        stats = _request_stats.get()
+        if stats is not None:
+            stats["queries"] += 1
+            stats["db_seconds"] += elapsed
+
+        if slow_query_ms > 0 and elapsed * 1000 >= slow_query_ms:
+            DB_SLOW_QUERIES.inc(operation)
+            sql = " ".join(statement.split())
+            print(f"[slow query] {elapsed * 1000:.1f}ms {sql[:500]}"
+                  + (f" (executemany {len(parameters)})" if executemany else ""))
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(exception_context):
+        # 실패한 쿼리는 after_cursor_execute가 호출되지 않으므로 시작 시각만 정리
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("query_started"):
+            conn.info["query_started"].pop()
+
+
+# ============================
+# 템플릿 렌더링 시간
+# ============================
+
+class TimedTemplate(jinja2.Template):
+    def render(self, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return super().render(*args, **kwargs)
+        finally:
+            TEMPLATE_RENDER.observe(time.perf_counter() - started, self.name or "<string>")
+
+
+def instrument_templates(templates):
+    """Jinja2Templates의 환경이 TimedTemplate을 쓰도록 설정 (템플릿을 읽기 전에 호출)"""
+    templates.env.template_class = TimedTemplate
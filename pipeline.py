@@ -1,28 +1,113 @@
-import pandas as pd
+import asyncio
 import os
-from get_pdf import download_pdfs
-from get_review import generate_reviews
+from get_pdf import download_pdfs, pdf_path
+from extract import extract_texts
+from review import generate_reviews, backend_name
+from db import init_db, save_reviews_by_report_id
+from jobs import enqueue_new_reports, pending, mark_done, mark_failed, record_pdf_hashes, stage_counts
+
+BATCH_SIZE = int(os.environ.get("PIPELINE_BATCH_SIZE", 200))  # 단계별 한 번에 처리하는 리포트 수
+
+
+# ============================
+# 단계별 처리 함수
+# ============================
+# 각 함수는 pending() 행 목록을 받아 (완료 report_id 목록, {report_id: 오류}) 를 반환합니다.
+
+def download_stage(batch) -> tuple[list[int], dict[int, str]]:
+    ids_by_url = {row.attachment_url: row.report_id for row in batch}
+    manifest = download_pdfs(list(ids_by_url))
+
+    done = [ids_by_url[e["url"]] for e in manifest["downloaded"] + manifest["skipped"]]
+    errors = {ids_by_url[e["url"]]: e["error"] for e in manifest["failed"]}
+    return done, errors
+
+
+def extract_stage(batch) -> tuple[list[int], dict[int, str]]:
+    ids_by_path = {pdf_path(row.attachment_url): row.report_id for row in batch}
+    results = extract_texts(list(ids_by_path))
+
+    hashes, errors = {}, {}
+    for path, (pdf_sha256, error) in results.items():
+        if error:
+            errors[ids_by_path[path]] = error
+        else:
+            hashes[ids_by_path[path]] = pdf_sha256
+    record_pdf_hashes(hashes)
+    return list(hashes), errors
+
+
+def review_stage(batch) -> tuple[list[int], dict[int, str]]:
+    reviews, review_errors = asyncio.run(generate_reviews([row.pdf_sha256 for row in batch]))
+
+    # 생성된 리뷰를 report_id 기준으로 한 트랜잭션에 반영 (쓰기 실패는 예외 → run_stage가 배치 전체를 실패 처리)
+    # 실제로 UPDATE된 행만 완료로 기록
+    done = save_reviews_by_report_id(
+        {row.report_id: reviews[row.pdf_sha256] for row in batch if row.pdf_sha256 in reviews}
+    )
+
+    errors = {row.report_id: review_errors[row.pdf_sha256] for row in batch if row.pdf_sha256 in review_errors}
+    missing = {row.report_id for row in batch if row.pdf_sha256 in reviews} - set(done)
+    errors.update({report_id: "report not found" for report_id in missing})
+    return done, errors
+
+
+STAGE_HANDLERS = [
+    ("downloaded", download_stage),
+    ("extracted", extract_stage),
+    ("reviewed", review_stage),
+]
+
+
+def active_stage_handlers() -> list:
+    """
+    실행할 단계 목록. 리뷰 백엔드(REVIEW_BACKEND)가 없으면 reviewed 단계만 빼고 경고 출력
+    (다운로드/추출은 계속 진행하고, 리뷰 작업은 실패 횟수를 쌓지 않고 extracted 상태로 대기)
+    """
+    try:
+        backend_name()
+    except RuntimeError as e:
+        print(f"경고: reviewed 단계를 건너뜁니다 ({e})")
+        return [(stage, handler) for stage, handler in STAGE_HANDLERS if stage != "reviewed"]
+    return STAGE_HANDLERS
+
+
+def run_stage(stage: str, handler, batch_size: int = BATCH_SIZE):
+    """대기 중이거나 실패한 작업만 batch_size개씩 처리. 배치마다 상태를 저장하므로 중단돼도 이어서 실행됩니다."""
+    last_id = 0
+    total_done = total_failed = 0
+    while True:
+        batch = pending(stage, batch_size, after_id=last_id)
+        if not batch:
+            break
+        last_id = batch[-1][0]
+
+        try:
+            done, errors = handler(batch)
+        except Exception as e:
+            done, errors = [], {row[0]: str(e) for row in batch}
+
+        mark_done(stage, done)
+        mark_failed(stage, errors)
+        total_done += len(done)
+        total_failed += len(errors)
+        print(f"[{stage}] 완료 {total_done}건, 실패 {total_failed}건")
+
 
 def main():
-    # 1. Load Report URLs from DB
-    from db import get_all_report_urls
-    
-    print("Fetching report URLs from DB...")
-    pdf_urls = get_all_report_urls()
-    
-    if not pdf_urls:
-        print("No report URLs found in DB.")
-        return
-
-    # 2. Download PDFs
-    print(f"Starting PDF download for {len(pdf_urls)} files...")
-    download_pdfs(pdf_urls)
-    print("PDF download complete.")
-
-    # 3. Generate Reviews
-    print("Starting review generation...")
-    generate_reviews()
-    print("Review generation complete.")
+    # 리뷰 백엔드 설정 확인 (잘못된 이름이면 시작 전에 중단, 설정이 없으면 리뷰 단계만 건너뜀)
+    handlers = active_stage_handlers()
+    init_db()
+
+    # 1. 새로 적재된 리포트를 작업 대상으로 등록
+    print(f"New reports queued: {enqueue_new_reports()}")
+
+    # 2. 단계별로 남은 작업만 실행
+    for stage, handler in handlers:
+        print(f"Running stage: {stage}")
+        run_stage(stage, handler)
+
+    print(f"Pipeline state: {stage_counts()}")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,180 @@
+import argparse
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+import numpy as np
+import pandas as pd
+
+# ============================
+# 로컬 일별 시세 저장소
+# ============================
+# 종목별 일봉(OHLCV)을 PRICE_STORE_DIR/<종목코드>.bin에 고정 길이 레코드(RECORD_DTYPE)로 날짜순 이어 붙여 저장합니다.
+# 파일 전체가 레코드 배열이라 np.memmap으로 바로 열리고, 기간 조회는 날짜 컬럼 searchsorted 후 슬라이스 (복사 없음)
+# top_up은 종목별 마지막 저장일 다음 날부터만 FinanceDataReader로 받아 덧붙입니다. (이미 저장한 날짜는 다시 받지 않음)
+# 장중 값이 저장되지 않도록 오늘 일봉은 저장하지 않습니다. (현재가는 services.update_stock_prices가 담당)
+PRICE_STORE_DIR = os.environ.get("PRICE_STORE_DIR", "cache/prices")
+PRICE_HISTORY_START = date.fromisoformat(os.environ.get("PRICE_HISTORY_START", "2015-01-01"))  # 처음 받을 때 시작일
+PRICE_STORE_WORKERS = int(os.environ.get("PRICE_STORE_WORKERS", 8))  # 종목별 조회 동시 실행 수
+
+RECORD_DTYPE = np.dtype([
+    ("date", "M8[D]"),
+    ("open", "f8"),
+    ("high", "f8"),
+    ("low", "f8"),
+    ("close", "f8"),
+    ("volume", "i8"),
+])
+_EMPTY = np.empty(0, dtype=RECORD_DTYPE)
+
+_append_lock = threading.Lock()
+
+
+def _path(code: str) -> str:
+    return os.path.join(PRICE_STORE_DIR, f"{code}.bin")
+
+
+# ============================
+# 읽기
+# ============================
+
+def read_records(code: str, start: date | None = None, end: date | None = None) -> np.ndarray:
+    """
+    [start, end] 기간 일봉 레코드 배열 (RECORD_DTYPE, 날짜순). 저장된 데이터가 없으면 빈 배열.
+    memmap 슬라이스를 그대로 반환하므로 값을 바꾸지 말고 읽기만 할 것
+    """
+    path = _path(code)
+    try:
+        count = os.path.getsize(path) // RECORD_DTYPE.itemsize
+    except OSError:
+        return _EMPTY
+    if count == 0:
+        return _EMPTY
+    # 끝에 덜 쓰인 레코드가 있어도 온전한 레코드까지만 매핑
+    records = np.memmap(path, dtype=RECORD_DTYPE, mode="r", shape=(count,))
+    dates = records["date"]
+    lo = np.searchsorted(dates, np.datetime64(start, "D"), side="left") if start else 0
+    hi = np.searchsorted(dates, np.datetime64(end, "D"), side="right") if end else count
+    return records[lo:hi]
+
+
+def read_prices(code: str, start: date | None = None, end: date | None = None) -> pd.DataFrame:
+    """기간 일봉을 fdr.DataReader와 같은 형태(DatetimeIndex, Open/High/Low/Close/Volume 컬럼)로 반환"""
+    records = read_records(code, start, end)
+    return pd.DataFrame(
+        {
+            "Open": records["open"],
+            "High": records["high"],
+            "Low": records["low"],
+            "Close": records["close"],
+            "Volume": records["volume"],
+        },
+        index=pd.DatetimeIndex(records["date"].astype("M8[ns]"), name="Date"),
+    )
+
+
+def last_date(code: str) -> date | None:
+    """마지막으로 저장한 거래일"""
+    records = read_records(code)
+    return records["date"][-1].item() if len(records) else None
+
+
+def load_closes(codes: list[str], start: date, end: date) -> pd.DataFrame:
+    """여러 종목의 기간 종가를 DataFrame[code, date, close]로 (accuracy.update_accuracy의 price_loader)"""
+    parts = [(code, read_records(code, start, end)) for code in codes]
+    parts = [(code, records) for code, records in parts if len(records)]
+    if not parts:
+        return pd.DataFrame({"code": [], "date": np.array([], "M8[ns]"), "close": []})
+    return pd.DataFrame({
+        "code": np.repeat([code for code, _ in parts], [len(records) for _, records in parts]),
+        "date": np.concatenate([records["date"] for _, records in parts]).astype("M8[ns]"),
+        "close": np.concatenate([records["close"] for _, records in parts]),
+    })
+
+
+# ============================
+# 쓰기 (덧붙이기만)
+# ============================
+
+def append_prices(code: str, df: pd.DataFrame) -> int:
+    """
+    fdr.DataReader 형식의 일봉 중 마지막 저장일 이후(오늘 제외)만 파일 끝에 덧붙이고 추가한 행 수를 반환
+    """
+    if df is None or df.empty:
+        return 0
+    dates = pd.DatetimeIndex(df.index).to_numpy("M8[D]")
+    with _append_lock:
+        last = last_date(code)
+        keep = dates < np.datetime64(date.today(), "D")
+        if last is not None:
+            keep &= dates > np.datetime64(last, "D")
+        if not keep.any():
+            return 0
+
+        records = np.zeros(int(keep.sum()), dtype=RECORD_DTYPE)
+        records["date"] = dates[keep]
+        for field, column in (("open", "Open"), ("high", "High"), ("low", "Low"), ("close", "Close")):
+            records[field] = df[column].to_numpy(float)[keep]
+        records["volume"] = df["Volume"].fillna(0).to_numpy(np.int64)[keep]
+        records = np.sort(records, order="date")
+
+        path = _path(code)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "ab") as f:
+            # 이전에 중단되어 끝에 남은 불완전한 레코드는 잘라냄
+            size = f.tell()
+            if size % RECORD_DTYPE.itemsize:
+                f.truncate(size - size % RECORD_DTYPE.itemsize)
+            f.write(records.tobytes())
+    return len(records)
+
+
+def top_up(codes: list[str], workers: int = PRICE_STORE_WORKERS) -> dict[str, int]:
+    """종목별로 마지막 저장일 다음 날부터 어제까지 받아서 덧붙임. 종목코드 → 추가한 행 수"""
+    import FinanceDataReader as fdr
+
+    # 오늘 이전 마지막 평일까지 저장되어 있으면 조회하지 않음 (주말에 다시 실행해도 요청 없음, 공휴일은 조회 후 0행)
+    last_weekday = np.busday_offset(np.datetime64(date.today(), "D"), -1, roll="forward").item()
+
+    def fetch(code):
+        last = last_date(code)
+        start = last + timedelta(days=1) if last else PRICE_HISTORY_START
+        if start > last_weekday:
+            return code, 0
+        try:
+            return code, append_prices(code, fdr.DataReader(code, start, date.today() - timedelta(days=1)))
+        except Exception as e:
+            print(f"시세 저장 실패 ({code}): {e}")
+            return code, 0
+
+    added = {}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for i, (code, count) in enumerate(pool.map(fetch, codes)):
+            added[code] = count
+            if (i + 1) % 100 == 0:
+                print(f"시세 저장 진행 중: {i + 1}/{len(codes)}")
+    print(f"시세 저장 완료: {sum(1 for c in added.values() if c)}/{len(codes)}개 종목, {sum(added.values()):,}행 추가")
+    return added
+
+
+# ============================
+# CLI
+# ============================
+
+def main():
+    parser = argparse.ArgumentParser(description="일별 시세 저장소 갱신 (마지막 저장일 이후만 조회)")
+    parser.add_argument("codes", nargs="*", help="종목코드 (기본: DB의 전체 종목)")
+    args = parser.parse_args()
+
+    codes = args.codes
+    if not codes:
+        from sqlalchemy import select
+        from db import SessionLocal, Stock
+
+        with SessionLocal() as session:
+            codes = list(session.scalars(select(Stock.stock_code)))
+    top_up(codes)
+
+
+if __name__ == "__main__":
+    main()
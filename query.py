@@ -1,7 +1,7 @@
 # query_3nf.py
 from sqlalchemy import select
 from db import (
-    SessionLocal, Stock, Broker, Author, Report
+    SessionLocal, Stock, Broker, Author, Report, search_reports_query
 )
 
 
@@ -36,16 +36,32 @@ def show_all_reports():
             print_report(r)
 
 
+# 전문 검색 인덱스로 관련도(bm25) 순 조회, 인덱스를 못 쓰면 None
+def search_ranked(session, q: str, columns: list[str]):
+    matched = search_reports_query(q, columns)
+    if matched is None:
+        return None
+    matched = matched.subquery()
+    return (
+        session.query(Report)
+        .join(matched, matched.c.report_id == Report.id)
+        .order_by(matched.c.rank, Report.written_date.desc())
+        .all()
+    )
+
+
 # 2) 종목명 검색 (전부)
 def search_by_stock_name(name: str):
     with SessionLocal() as session:
-        results = (
-            session.query(Report)
-            .join(Report.stock)
-            .filter(Stock.stock_name.like(f"%{name}%"))
-            .order_by(Report.written_date.desc())
-            .all()
-        )
+        results = search_ranked(session, name, ["stock_name", "stock_code"])
+        if results is None:
+            results = (
+                session.query(Report)
+                .join(Report.stock)
+                .filter(Stock.stock_name.like(f"%{name}%"))
+                .order_by(Report.written_date.desc())
+                .all()
+            )
 
         print(f"\n=== 종목명 검색: '{name}' ({len(results)}건) ===\n")
         for r in results:
@@ -55,13 +71,15 @@ def search_by_stock_name(name: str):
 # 3) 증권사 검색 (전부)
 def search_by_broker(name: str):
     with SessionLocal() as session:
-        results = (
-            session.query(Report)
-            .join(Report.broker)
-            .filter(Broker.name.like(f"%{name}%"))
-            .order_by(Report.written_date.desc())
-            .all()
-        )
+        results = search_ranked(session, name, ["broker_name"])
+        if results is None:
+            results = (
+                session.query(Report)
+                .join(Report.broker)
+                .filter(Broker.name.like(f"%{name}%"))
+                .order_by(Report.written_date.desc())
+                .all()
+            )
 
         print(f"\n=== 증권사 검색: '{name}' ({len(results)}건) ===\n")
         for r in results:
@@ -71,13 +89,15 @@ def search_by_broker(name: str):
 # 4) 애널리스트 검색 (전부)
 def search_by_author(name: str):
     with SessionLocal() as session:
-        results = (
-            session.query(Report)
-            .join(Report.author)
-            .filter(Author.name.like(f"%{name}%"))
-            .order_by(Report.written_date.desc())
-            .all()
-        )
+        results = search_ranked(session, name, ["author_name"])
+        if results is None:
+            results = (
+                session.query(Report)
+                .join(Report.author)
+                .filter(Author.name.like(f"%{name}%"))
+                .order_by(Report.written_date.desc())
+                .all()
+            )
 
         print(f"\n=== 애널리스트 검색: '{name}' ({len(results)}건) ===\n")
         for r in results:
@@ -0,0 +1,204 @@
+import abc
+import asyncio
+import hashlib
+import os
+from datetime import datetime
+import httpx
+from sqlalchemy import select, tuple_
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from db import SessionLocal, ReviewCache, writer
+from extract import iter_text
+
+# ============================
+# 리뷰 생성 설정 (환경변수로 변경 가능)
+# ============================
+REVIEW_BACKEND = os.environ.get("REVIEW_BACKEND")  # 필수: http (stub은 테스트에서 명시적으로 지정할 때만)
+PROMPT_VERSION = os.environ.get("REVIEW_PROMPT_VERSION", "v1")  # 프롬프트를 바꾸면 올려서 캐시 무효화
+REVIEW_MAX_IN_FLIGHT = int(os.environ.get("REVIEW_MAX_IN_FLIGHT", 4))  # 동시에 진행하는 생성 호출 수
+REVIEW_BATCH_SIZE = int(os.environ.get("REVIEW_BATCH_SIZE", 8))  # 백엔드 호출 1회에 넣는 문서 수
+REVIEW_MAX_CHARS = int(os.environ.get("REVIEW_MAX_CHARS", 20000))  # 백엔드에 넘기는 본문 최대 글자 수
+
+REVIEW_FIELDS = ("summary", "novice_content", "expert_content")
+
+
+# ============================
+# 백엔드
+# ============================
+
+class ReviewBackend(abc.ABC):
+    """
+    리뷰 생성 백엔드 인터페이스. generate는 본문 하나로 {"summary", "novice_content", "expert_content"}를 만듭니다.
+    한 번에 여러 문서를 처리할 수 있는 백엔드는 generate_batch를 재정의합니다.
+    cacheable이 False인 백엔드의 결과는 review_cache에 저장하지도, 캐시에서 읽지도 않습니다.
+    """
+    name = "base"
+    cacheable = True
+
+    @abc.abstractmethod
+    async def generate(self, text: str) -> dict:
+        ...
+
+    async def generate_batch(self, texts: list[str]) -> list[dict]:
+        return list(await asyncio.gather(*(self.generate(t) for t in texts)))
+
+    async def aclose(self):
+        pass
+
+
+class StubReviewBackend(ReviewBackend):
+    """외부 호출 없이 본문만으로 결정적인 결과를 만드는 백엔드 (테스트용, 결과는 캐시하지 않음)"""
+    name = "stub"
+    cacheable = False
+
+    async def generate(self, text: str) -> dict:
+        words = text.split()
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()[:8]
+        return {
+            "summary": " ".join(words[:40]),
+            "novice_content": f"[stub:{digest}] {len(words)} words",
+            "expert_content": f"[stub:{digest}] {' '.join(words[40:80])}",
+        }
+
+
+class HttpReviewBackend(ReviewBackend):
+    """
+    REVIEW_API_URL로 {"prompt_version", "documents": [본문, ...]}를 POST하고
+    {"reviews": [{"summary", "novice_content", "expert_content"}, ...]} 응답을 받는 백엔드
+    """
+    name = "http"
+
+    def __init__(self, url: str | None = None, timeout: float = 300.0):
+        self.url = url or os.environ["REVIEW_API_URL"]
+        self.client = httpx.AsyncClient(timeout=timeout)
+
+    async def generate(self, text: str) -> dict:
+        return (await self.generate_batch([text]))[0]
+
+    async def generate_batch(self, texts: list[str]) -> list[dict]:
+        response = await self.client.post(self.url, json={"prompt_version": PROMPT_VERSION, "documents": texts})
+        response.raise_for_status()
+        reviews = response.json()["reviews"]
+        if len(reviews) != len(texts):
+            raise ValueError(f"리뷰 개수 불일치: {len(reviews)} != {len(texts)}")
+        return reviews
+
+    async def aclose(self):
+        await self.client.aclose()
+
+
+BACKENDS: dict[str, type[ReviewBackend]] = {
+    StubReviewBackend.name: StubReviewBackend,
+    HttpReviewBackend.name: HttpReviewBackend,
+}
+
+def backend_name(name: str | None = None) -> str:
+    """사용할 백엔드 이름. 지정하지 않았고 REVIEW_BACKEND도 없으면 오류 (stub 결과가 실제 리뷰로 저장되지 않도록)"""
+    name = name or REVIEW_BACKEND
+    if not name:
+        raise RuntimeError(f"REVIEW_BACKEND is not set (available: {', '.join(BACKENDS)})")
+    if name not in BACKENDS:
+        raise ValueError(f"unknown review backend: {name} (available: {', '.join(BACKENDS)})")
+    return name
+
+def get_backend(name: str | None = None) -> ReviewBackend:
+    return BACKENDS[backend_name(name)]()
+
+
+# ============================
+# 결과 캐시 (review_cache 테이블)
+# ============================
+
+def get_cached_reviews(pdf_hashes: list[str], prompt_version: str = PROMPT_VERSION) -> dict[str, dict]:
+    keys = [(h, prompt_version) for h in set(pdf_hashes)]
+    cached = {}
+    with SessionLocal() as session:
+        for i in range(0, len(keys), 400):
+            rows = session.execute(
+                select(ReviewCache).where(
+                    tuple_(ReviewCache.pdf_sha256, ReviewCache.prompt_version).in_(keys[i:i + 400])
+                )
+            ).scalars()
+            for row in rows:
+                cached[row.pdf_sha256] = {field: getattr(row, field) for field in REVIEW_FIELDS}
+    return cached
+
+def _insert_cached_reviews(session, reviews: dict[str, dict], backend: str, prompt_version: str):
+    if not reviews:
+        return
+    now = datetime.now()
+    session.execute(
+        sqlite_insert(ReviewCache.__table__).on_conflict_do_nothing(),
+        [
+            {
+                "pdf_sha256": pdf_sha256,
+                "prompt_version": prompt_version,
+                "backend": backend,
+                "created_at": now,
+                **{field: review.get(field) for field in REVIEW_FIELDS},
+            }
+            for pdf_sha256, review in reviews.items()
+        ],
+    )
+
+def save_cached_reviews(reviews: dict[str, dict], backend: str, prompt_version: str = PROMPT_VERSION):
+    writer.write(_insert_cached_reviews, reviews, backend, prompt_version)
+
+
+# ============================
+# 리뷰 생성
+# ============================
+
+def _read_for_review(pdf_sha256: str, max_chars: int = REVIEW_MAX_CHARS) -> str:
+    parts, size = [], 0
+    for chunk in iter_text(pdf_sha256):
+        parts.append(chunk)
+        size += len(chunk)
+        if size >= max_chars:
+            break
+    return "".join(parts)[:max_chars]
+
+async def generate_reviews(pdf_hashes: list[str], backend: ReviewBackend | None = None,
+                           max_in_flight: int = REVIEW_MAX_IN_FLIGHT, batch_size: int = REVIEW_BATCH_SIZE,
+                           prompt_version: str = PROMPT_VERSION) -> tuple[dict[str, dict], dict[str, str]]:
+    """
+    PDF 해시별 리뷰를 만듭니다. 캐시에 있는 (해시, 프롬프트 버전)은 그대로 쓰고 (cacheable 백엔드만),
+    나머지만 batch_size개씩 묶어 최대 max_in_flight개 호출을 동시에 진행합니다.
+    새로 만든 결과는 배치가 끝날 때마다 캐시에 저장하므로 중간에 멈춰도 다시 비용이 들지 않습니다.
+    반환: ({해시: 리뷰}, {해시: 오류 메시지})
+    """
+    own_backend = backend is None
+    backend = backend or get_backend()
+    reviews = get_cached_reviews(pdf_hashes, prompt_version) if backend.cacheable else {}
+    cached_count = len(reviews)
+    missing = [h for h in dict.fromkeys(pdf_hashes) if h not in reviews]
+    errors: dict[str, str] = {}
+    if not missing:
+        if own_backend:
+            await backend.aclose()
+        return reviews, errors
+
+    semaphore = asyncio.Semaphore(max_in_flight)
+
+    async def run_batch(batch: list[str]):
+        async with semaphore:
+            try:
+                texts = [_read_for_review(h) for h in batch]
+                results = await backend.generate_batch(texts)
+            except Exception as e:
+                errors.update({h: f"{type(e).__name__}: {e}" for h in batch})
+                return
+        generated = dict(zip(batch, results))
+        if backend.cacheable:
+            await writer.write_async(_insert_cached_reviews, generated, backend.name, prompt_version)
+        reviews.update(generated)
+
+    try:
+        await asyncio.gather(*(
+            run_batch(missing[i:i + batch_size]) for i in range(0, len(missing), batch_size)
+        ))
+    finally:
+        if own_backend:
+            await backend.aclose()
+
+    print(f"리뷰 생성 {len(missing) - len(errors)}건, 캐시 사용 {cached_count}건, 실패 {len(errors)}건")
+    return reviews, errors
@@ -1,23 +1,51 @@
-import requests
+import argparse
+import asyncio
+from datetime import date, timedelta
+import httpx
 from bs4 import BeautifulSoup
-import time
 import pandas as pd
-import FinanceDataReader as fdr
 import re
 import numpy as np
 from get_pdf import download_pdfs
+from throttle import TokenBucket, backoff_delay
+from db import bulk_save_reports
+from listing import get_stock_listing
 
-stocks = fdr.StockListing('KRX') # 코스피, 코스닥, 코넥스 전체
+class StockIndex:
+    """
+    제목에서 종목을 찾기 위한 종목코드 조회 테이블 (수집 1회당 한 번 생성).
+    제목의 모든 코드 길이 부분 문자열을 dict로 조회하므로 제목 길이에 비례하는 시간에 끝납니다.
+    기존 전체 순회와 같은 규칙: 코드와 종목명이 모두 제목에 있어야 하고, 여러 개면 목록상 마지막 종목.
+    """
 
-stocks['Symbol'] = stocks['Code'].astype(str)
-def remove_noise_and_split_title(title):
-    in_code = ''
-    in_name = ''
+    def __init__(self, listing: pd.DataFrame):
+        self.by_code: dict[str, list[tuple[int, str]]] = {}
+        for order, (code, name) in enumerate(zip(listing['Code'].astype(str), listing['Name'])):
+            if code:
+                self.by_code.setdefault(code, []).append((order, name))
+        self.code_lengths = sorted({len(code) for code in self.by_code})
 
-    for code, name in stocks[['Symbol', 'Name']].values:
-        if code in title and name in title:
-            in_code = code
-            in_name = name
+    def match(self, title: str) -> tuple[str, str]:
+        """(종목코드, 종목명), 없으면 ('', '')"""
+        best_order, in_code, in_name = -1, '', ''
+        for length in self.code_lengths:
+            for i in range(len(title) - length + 1):
+                code = title[i:i + length]
+                for order, name in self.by_code.get(code, ()):
+                    if order > best_order and name in title:
+                        best_order, in_code, in_name = order, code, name
+        return in_code, in_name
+
+_stock_index: StockIndex | None = None
+
+def get_stock_index() -> StockIndex:
+    global _stock_index
+    if _stock_index is None:
+        _stock_index = StockIndex(get_stock_listing())
+    return _stock_index
+
+def remove_noise_and_split_title(title, index: StockIndex | None = None):
+    in_code, in_name = (index or get_stock_index()).match(title)
 
     # 한글, 영어, 숫자 외 노이즈 제거
     clean_title = re.sub('[^A-Za-z0-9가-힣]', ' ', title)
@@ -33,23 +61,40 @@ def remove_noise_and_split_title(title):
     else:
         return [in_name, in_code, clean_title]
 
-# 수정
-base_url = "https://consensus.hankyung.com/analysis/list?sdate=2025-08-20&edate=2025-11-20&now_page={}&search_value=&report_type=CO&pagenum=20&search_text=&business_code="
-data = []
-print("l")
-max_page = 36
-for page_no in range(1, max_page):
-    while True:
-        try:
-            url = base_url.format(page_no)
-            html = requests.get(url, headers={'User-Agent':'Gils'}).content
-            soup = BeautifulSoup(html, 'lxml')
-            print("{}/{}".format(page_no, max_page))
-            break
-        except:
-            time.sleep(15 * 60)
+# ============================================================
+# 목록 페이지 수집 (asyncio)
+# ============================================================
+BASE_URL = "https://consensus.hankyung.com/analysis/list"
+HEADERS = {'User-Agent': 'Gils'}
 
-    table = soup.find("div", {"class":"table_style01"}).find('table')
+# 기본 수집 설정 (명령행 인자로 변경 가능)
+MAX_PAGE = 35         # 마지막 페이지 번호 (포함)
+CONCURRENCY = 4       # 동시에 진행하는 요청 수
+RATE = 3.0            # 초당 요청 수 (전체)
+MAX_RETRIES = 5       # 페이지당 재시도 횟수
+TIMEOUT = 30.0        # 요청 타임아웃(초)
+
+def build_list_params(page_no: int, sdate: str, edate: str, pagenum: int = 20) -> dict:
+    return {
+        "sdate": sdate,
+        "edate": edate,
+        "now_page": page_no,
+        "search_value": "",
+        "report_type": "CO",
+        "pagenum": pagenum,
+        "search_text": "",
+        "business_code": "",
+    }
+
+def parse_list_page(html, index: StockIndex | None = None) -> list[list]:
+    """목록 페이지 HTML에서 레코드를 추출. 테이블이 없으면(마지막 페이지 이후 등) 빈 리스트"""
+    soup = BeautifulSoup(html, 'lxml')
+    container = soup.find("div", {"class":"table_style01"})
+    if container is None or container.find('table') is None:
+        return []
+
+    data = []
+    table = container.find('table')
     for tr in table.find_all("tr")[1:]: # 1번째 행부터 순회
         record = []
         all_tds = tr.find_all("td") # 한 행의 모든 셀을 저장
@@ -58,7 +103,7 @@ for page_no in range(1, max_page):
         for i, td in enumerate(all_tds): # 한 행 순회
             if i in indices: # 해당하는 열인 경우
                 if i == 1:
-                    record += remove_noise_and_split_title(td.text) # remove_noise_title의 출력과 이어 붙임
+                    record += remove_noise_and_split_title(td.text, index) # remove_noise_title의 출력과 이어 붙임
                 elif i == 3: # 노이즈가 껴있는 세번째 셀만 따로 처리
                     record.append(td.text.replace(" ", "").replace("\r","").replace("\n",""))
                 elif i == 6: # 기업정보 링크가 있는 열
@@ -95,64 +140,134 @@ for page_no in range(1, max_page):
         if None not in record: # 레코드에 None이 없으면
             data.append(record)
 
-    time.sleep(0.3) # 연결 끊김 방지를 위해
-    time.sleep(0.3) # 연결 끊김 방지를 위해
+    return data
+
+async def fetch_page(client: httpx.AsyncClient, url: str, params: dict, limiter: TokenBucket,
+                     max_retries: int = MAX_RETRIES) -> bytes:
+    """
+    한 페이지 요청. 연결 오류, 429, 5xx는 지수 백오프(jitter)로 재시도하고
+    그 외 4xx나 재시도 초과 시 예외를 올립니다.
+    본문은 bytes로 반환 (BeautifulSoup이 페이지의 <meta charset>으로 디코딩하도록)
+    """
+    for attempt in range(max_retries + 1):
+        await limiter.acquire()
+        try:
+            response = await client.get(url, params=params)
+            if response.status_code != 429 and response.status_code < 500:
+                response.raise_for_status()
+                return response.content
+            error = f"Status Code: {response.status_code}"
+        except httpx.TransportError as e:
+            error = repr(e)
+
+        if attempt == max_retries:
+            raise RuntimeError(f"{url} now_page={params.get('now_page')} 요청 실패 ({error})")
+        delay = backoff_delay(attempt)
+        print(f"재시도 {attempt + 1}/{max_retries} ({error}), {delay:.1f}초 후")
+        await asyncio.sleep(delay)
+
+async def crawl(sdate: str, edate: str, max_page: int = MAX_PAGE, *,
+                base_url: str = BASE_URL, concurrency: int = CONCURRENCY, rate: float = RATE,
+                max_retries: int = MAX_RETRIES, timeout: float = TIMEOUT) -> list[list]:
+    """
+    1 ~ max_page 목록 페이지를 동시에 수집해 페이지 순서대로 레코드를 반환합니다.
+    연결은 keep-alive 풀(최대 concurrency개)로 재사용하고, 전체 요청 속도는 rate(초당)로 제한합니다.
+    base_url을 바꾸면 로컬 스텁 서버를 대상으로 실행할 수 있습니다.
+    """
+    index = StockIndex(get_stock_listing())  # 코스피, 코스닥, 코넥스 전체
+    limiter = TokenBucket(rate, burst=concurrency)
+    semaphore = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    failed_pages = []
+
+    async with httpx.AsyncClient(headers=HEADERS, limits=limits, timeout=timeout, follow_redirects=True) as client:
+        async def crawl_page(page_no: int) -> list[list]:
+            async with semaphore:
+                try:
+                    html = await fetch_page(
+                        client, base_url, build_list_params(page_no, sdate, edate), limiter, max_retries
+                    )
+                except Exception as e:
+                    print(f"페이지 {page_no} 수집 실패: {e}")
+                    failed_pages.append(page_no)
+                    return []
+            records = parse_list_page(html, index)
+            print("{}/{}".format(page_no, max_page))
+            return records
+
+        pages = await asyncio.gather(*(crawl_page(p) for p in range(1, max_page + 1)))
+
+    if failed_pages:
+        print(f"수집 실패 페이지: {sorted(failed_pages)}")
+    return [record for records in pages for record in records]
+
+# ============================================================
+# 레코드 → DB 적재용 dict 변환
+# ============================================================
+def records_to_reports(data: list[list]) -> list[dict]:
+    reports_data = []
+
+    # data는 list of lists 형태
+    # columns = ["작성일", "종목명", "종목코드", "제목", "적정가격", "평가의견", "작성자", "작성기관", "기업정보", "첨부파일"]
+    for record in data:
+        # record: [date, stock_name, stock_code, title, fair_price, rating, author, broker, company_url, pdf_url]
+
+        # 적정가격 전처리
+        fair_price_str = str(record[4]).replace(',', '')
+        try:
+            fair_price = int(fair_price_str)
+            if fair_price == 0: fair_price = None
+        except:
+            fair_price = None
+
+        # 현재가격/기대수익률은 DB에 넣은 뒤 주가 업데이트 단계에서 채움
+        report_dict = {
+            "written_date": record[0],
+            "stock_name": record[1],
+            "stock_code": record[2],
+            "title": record[3],
+            "fair_price": fair_price,
+            "current_price": None, # 나중에 업데이트
+            "expected_return": None, # 나중에 업데이트
+            "rating_code": record[5],
+            "author_name": record[6],
+            "broker_name": record[7],
+            "company_info_url": record[8],
+            "attachment_url": record[9],
+        }
+        reports_data.append(report_dict)
+
+    return reports_data
 
 # ============================================================
 # 데이터 DB 저장 (CSV 생성 제거)
 # ============================================================
-from db import save_reports
-
-reports_data = []
-
-# data는 현재 list of lists 형태임.
-# columns = ["작성일", "종목명", "종목코드", "제목", "적정가격", "평가의견", "작성자", "작성기관", "기업정보", "첨부파일"]
-
-for record in data:
-    # record: [date, stock_name, stock_code, title, fair_price, rating, author, broker, company_url, pdf_url]
-    
-    # 적정가격 전처리
-    fair_price_str = str(record[4]).replace(',', '')
-    try:
-        fair_price = int(fair_price_str)
-        if fair_price == 0: fair_price = None
-    except:
-        fair_price = None
-
-    # 현재가격 조회 (여기서 바로 조회하거나, 나중에 update_stock_prices로 채우거나)
-    # 기존 로직 유지: 여기서 조회해서 넣음
-    current_price = None
-    stock_code = record[2]
-    
-    # 간단히 하기 위해 여기서는 현재가격 조회를 생략하고 update_stock_prices에 맡기거나,
-    # 기존처럼 fdr로 조회할 수도 있음. 
-    # 기존 로직이 복잡하므로, 일단 DB에 넣고 나중에 업데이트하는 방식이 깔끔함.
-    # 하지만 "기대수익률" 계산을 위해 필요하다면 여기서 조회해야 함.
-    
-    # 기대수익률 계산은 DB 뷰나 별도 로직으로 빼는게 좋지만, 일단 기존 로직 최대한 유지하려면:
-    # (여기서는 생략하고 DB insert만 집중)
-    
-    report_dict = {
-        "written_date": record[0],
-        "stock_name": record[1],
-        "stock_code": record[2],
-        "title": record[3],
-        "fair_price": fair_price,
-        "current_price": None, # 나중에 업데이트
-        "expected_return": None, # 나중에 업데이트
-        "rating_code": record[5],
-        "author_name": record[6],
-        "broker_name": record[7],
-        "company_info_url": record[8],
-        "attachment_url": record[9],
-    }
-    reports_data.append(report_dict)
+def main():
+    today = date.today()
+    parser = argparse.ArgumentParser(description="한경 컨센서스 기업 리포트 목록 수집")
+    parser.add_argument("--sdate", default=(today - timedelta(days=92)).isoformat(), help="시작일 (YYYY-MM-DD)")
+    parser.add_argument("--edate", default=today.isoformat(), help="종료일 (YYYY-MM-DD)")
+    parser.add_argument("--max-page", type=int, default=MAX_PAGE, help="마지막 페이지 번호")
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY, help="동시 요청 수")
+    parser.add_argument("--rate", type=float, default=RATE, help="초당 요청 수")
+    parser.add_argument("--base-url", default=BASE_URL, help="목록 페이지 URL (테스트용 스텁 서버 등)")
+    args = parser.parse_args()
+
+    data = asyncio.run(crawl(
+        args.sdate, args.edate, args.max_page,
+        base_url=args.base_url, concurrency=args.concurrency, rate=args.rate,
+    ))
+
+    reports_data = records_to_reports(data)
+    print(f"총 {len(reports_data)}개의 리포트 데이터를 DB에 저장합니다.")
+    counts = bulk_save_reports(reports_data)
+    print(f"신규 {counts['inserted']}건, 중복 {counts['skipped']}건")
 
-print(f"총 {len(reports_data)}개의 리포트 데이터를 DB에 저장합니다.")
-save_reports(reports_data)
+    # PDF 다운로드 실행 (필요하다면)
+    # print("PDF 다운로드를 시작합니다...")
+    # pdf_urls = [r['attachment_url'] for r in reports_data if r['attachment_url']]
+    # download_pdfs(pdf_urls)
+    # print("PDF 다운로드 완료.")
 
-# PDF 다운로드 실행 (필요하다면)
-# print("PDF 다운로드를 시작합니다...")
-# pdf_urls = [r['attachment_url'] for r in reports_data if r['attachment_url']]
-# download_pdfs(pdf_urls)
-# print("PDF 다운로드 완료.")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -1,31 +1,110 @@
-from db import SessionLocal, Stock
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import select, update
+from db import SessionLocal, Stock, refresh_report_returns, refresh_stock_summary, bump_data_version, writer
 import FinanceDataReader as fdr
 from datetime import datetime, timedelta
+from listing import get_stock_listing
 
-def update_stock_prices():
-    print("주가 업데이트 시작...")
-    session = SessionLocal()
+# ============================
+# 주가 업데이트 설정 (환경변수로 변경 가능)
+# ============================
+PRICE_REFRESH_INTERVAL = int(os.environ.get("PRICE_REFRESH_INTERVAL", 60 * 60))  # 초, 0 이하면 주기 실행 안 함
+PRICE_SNAPSHOT_MAX_AGE = int(os.environ.get("PRICE_SNAPSHOT_MAX_AGE", 10 * 60))  # 시세 스냅샷(종목 목록) 허용 나이(초)
+PRICE_WORKERS = int(os.environ.get("PRICE_WORKERS", 8))  # 스냅샷을 못 쓸 때 종목별 조회 동시 실행 수
+PRICE_UPDATE_BATCH_SIZE = 500
+
+
+def _fetch_close(code: str) -> int | None:
+    # 최근 1주일 데이터 중 마지막 종가
+    start_date = datetime.now() - timedelta(days=7)
+    df = fdr.DataReader(code, start_date)
+    if df.empty:
+        return None
+    return int(df['Close'].iloc[-1])
+
+
+def fetch_prices(codes: list[str]) -> dict[str, int]:
+    """
+    종목코드 → 현재가. KRX 전체 시세 스냅샷(종목 목록의 Close) 한 번으로 가져오고,
+    스냅샷을 받을 수 없으면 종목별 조회를 PRICE_WORKERS개 스레드로 나눠 실행합니다.
+    스냅샷에 없는 종목(상장폐지 등)은 결과에서 빠집니다.
+    """
     try:
-        stocks = session.query(Stock).all()
-        total = len(stocks)
-        for i, stock in enumerate(stocks):
-            try:
-                # 최근 1주일 데이터 조회
-                start_date = datetime.now() - timedelta(days=7)
-                df = fdr.DataReader(stock.stock_code, start_date)
-                if not df.empty:
-                    latest_price = int(df['Close'].iloc[-1])
-                    stock.current_price = latest_price
-            except Exception as e:
-                print(f"Error fetching price for {stock.stock_name} ({stock.stock_code}): {e}")
-            
+        listing = get_stock_listing(max_age=PRICE_SNAPSHOT_MAX_AGE, allow_stale=False)
+        if 'Close' in listing:
+            snapshot = dict(zip(listing['Code'], listing['Close']))
+            return {
+                code: int(snapshot[code])
+                for code in codes
+                if code in snapshot and snapshot[code] == snapshot[code]  # NaN 제외
+            }
+    except Exception as e:
+        print(f"시세 스냅샷 조회 실패, 종목별 조회로 대체: {e}")
+
+    def fetch(code):
+        try:
+            return code, _fetch_close(code)
+        except Exception as e:
+            print(f"Error fetching price for {code}: {e}")
+            return code, None
+
+    prices = {}
+    with ThreadPoolExecutor(max_workers=PRICE_WORKERS) as pool:
+        for i, (code, price) in enumerate(pool.map(fetch, codes)):
+            if price is not None:
+                prices[code] = price
             if (i + 1) % 10 == 0:
-                print(f"주가 업데이트 진행 중: {i + 1}/{total}")
-        
-        session.commit()
-        print("주가 업데이트 완료")
+                print(f"주가 업데이트 진행 중: {i + 1}/{len(codes)}")
+    return prices
+
+
+def update_stock_prices() -> list[int]:
+    """모든 종목의 현재가를 갱신하고, 가격이 바뀐 종목 id 목록을 반환합니다."""
+    print("주가 업데이트 시작...")
+
+    # 네트워크 조회 동안 세션을 잡고 있지 않도록 읽기/쓰기를 나눔
+    with SessionLocal() as session:
+        stocks = session.execute(select(Stock.id, Stock.stock_code, Stock.current_price)).all()
+
+    prices = fetch_prices([code for _, code, _ in stocks])
+    changes = [
+        {"id": stock_id, "current_price": prices[code]}
+        for stock_id, code, current_price in stocks
+        if code in prices and prices[code] != current_price
+    ]
+
+    try:
+        # 쓰기는 단일 writer 스레드에서 실행 (리포트 적재/리뷰 저장과 잠금 경쟁 없음)
+        changed_ids = writer.write(_apply_price_changes, changes)
+        print(f"주가 업데이트 완료 ({len(changed_ids)}/{len(stocks)}개 종목 변경)")
+        return changed_ids
     except Exception as e:
-        session.rollback()
         print(f"주가 업데이트 실패: {e}")
-    finally:
-        session.close()
+        return []
+
+
+def _apply_price_changes(session, changes: list[dict]) -> list[int]:
+    # 기본키 기준 executemany UPDATE를 배치 단위로 실행
+    for i in range(0, len(changes), PRICE_UPDATE_BATCH_SIZE):
+        session.execute(update(Stock), changes[i:i + PRICE_UPDATE_BATCH_SIZE])
+    changed_ids = [c["id"] for c in changes]
+    # 가격이 바뀐 종목만 리포트 기대수익률과 요약 테이블 갱신
+    refresh_report_returns(session, changed_ids)
+    refresh_stock_summary(session, changed_ids)
+    if changed_ids:
+        bump_data_version(session)
+    return changed_ids
+
+
+async def run_price_refresher(interval: int = PRICE_REFRESH_INTERVAL):
+    """앱 안에서 interval초마다 주가를 갱신하는 백그라운드 작업 (이벤트 루프를 막지 않도록 스레드에서 실행)"""
+    while True:
+        try:
+            await asyncio.to_thread(update_stock_prices)
+        except Exception as e:
+            print(f"주가 업데이트 작업 오류: {e}")
+        if interval <= 0:
+            return
+        await asyncio.sleep(interval)
@@ -0,0 +1,11 @@
+import os
+import sys
+import tempfile
+
+# 테스트용 임시 DB / 텍스트 캐시 (db 모듈이 import될 때 DB_URL을 읽으므로 먼저 설정)
+_TMP_DIR = tempfile.mkdtemp(prefix="hci-test-")
+os.environ["DB_URL"] = f"sqlite:///{os.path.join(_TMP_DIR, 'reports.db')}"
+os.environ["TEXT_CACHE_DIR"] = os.path.join(_TMP_DIR, "text")
+os.environ.pop("REVIEW_BACKEND", None)
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
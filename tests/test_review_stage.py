@@ -0,0 +1,117 @@
+import hashlib
+import os
+import pytest
+from sqlalchemy import text
+import db
+import pipeline
+import review
+from extract import text_path
+from jobs import enqueue_new_reports, mark_done, record_pdf_hashes
+
+
+def _setup_extracted_reports(count: int) -> list[int]:
+    """리포트를 적재하고 extracted 단계까지 진행한 상태로 만듦 (텍스트는 캐시에 직접 작성)"""
+    db.init_db()
+    with db.engine.begin() as conn:
+        conn.execute(text("DELETE FROM review_cache"))
+    start = db.engine.connect().execute(text("SELECT COALESCE(MAX(report_idx), 700000) FROM reports")).scalar() + 1
+    db.save_reports([
+        {
+            "written_date": "2025-01-02",
+            "stock_name": "삼성전자",
+            "stock_code": "005930",
+            "title": f"테스트 리포트 {i}",
+            "fair_price": 100000,
+            "rating_code": "Buy",
+            "author_name": "테스트",
+            "broker_name": "테스트증권",
+            "attachment_url": f"https://consensus.hankyung.com/analysis/downpdf?report_idx={start + i}",
+        }
+        for i in range(count)
+    ])
+    enqueue_new_reports()
+    with db.engine.connect() as conn:
+        report_ids = list(conn.execute(
+            text("SELECT report_id FROM report_jobs WHERE stage = 'scraped' ORDER BY report_id")
+        ).scalars())
+
+    hashes = {}
+    for report_id in report_ids:
+        content = f"리포트 {report_id} 본문 " * 30
+        pdf_sha256 = hashlib.sha256(content.encode("utf-8")).hexdigest()
+        os.makedirs(os.path.dirname(text_path(pdf_sha256)), exist_ok=True)
+        with open(text_path(pdf_sha256), "w", encoding="utf-8") as f:
+            f.write(content)
+        hashes[report_id] = pdf_sha256
+    mark_done("downloaded", report_ids)
+    record_pdf_hashes(hashes)
+    mark_done("extracted", report_ids)
+    return report_ids
+
+
+@pytest.fixture
+def stub_backend(monkeypatch):
+    monkeypatch.setattr(review, "REVIEW_BACKEND", "stub")
+
+
+def test_backend_required(monkeypatch):
+    monkeypatch.setattr(review, "REVIEW_BACKEND", None)
+    with pytest.raises(RuntimeError):
+        review.get_backend()
+
+
+def test_pipeline_skips_review_without_backend(monkeypatch):
+    monkeypatch.setattr(review, "REVIEW_BACKEND", None)
+    stages = [stage for stage, _ in pipeline.active_stage_handlers()]
+    assert stages == ["downloaded", "extracted"]
+
+
+def test_pipeline_rejects_unknown_backend(monkeypatch):
+    monkeypatch.setattr(review, "REVIEW_BACKEND", "nope")
+    with pytest.raises(ValueError):
+        pipeline.active_stage_handlers()
+
+
+def test_review_stage_with_stub(stub_backend):
+    report_ids = _setup_extracted_reports(3)
+
+    pipeline.run_stage("reviewed", pipeline.review_stage)
+
+    with db.engine.connect() as conn:
+        rows = conn.execute(
+            text("SELECT id, summary, novice_content FROM reports WHERE id IN :ids").bindparams(
+                db.bindparam("ids", expanding=True)
+            ),
+            {"ids": report_ids},
+        ).all()
+        stages = set(conn.execute(
+            text("SELECT stage FROM report_jobs WHERE report_id IN :ids").bindparams(
+                db.bindparam("ids", expanding=True)
+            ),
+            {"ids": report_ids},
+        ).scalars())
+        cached = conn.execute(text("SELECT COUNT(*) FROM review_cache")).scalar()
+
+    assert len(rows) == 3
+    assert all(summary and novice.startswith("[stub:") for _, summary, novice in rows)
+    assert stages == {"reviewed"}
+    assert cached == 0  # stub 결과는 캐시하지 않음
+
+
+def test_review_stage_write_failure_marks_failed(stub_backend, monkeypatch):
+    report_ids = _setup_extracted_reports(2)
+
+    def fail(reviews):
+        raise RuntimeError("database is locked")
+    monkeypatch.setattr(pipeline, "save_reviews_by_report_id", fail)
+
+    pipeline.run_stage("reviewed", pipeline.review_stage)
+
+    with db.engine.connect() as conn:
+        jobs = conn.execute(
+            text("SELECT stage, attempts FROM report_jobs WHERE report_id IN :ids").bindparams(
+                db.bindparam("ids", expanding=True)
+            ),
+            {"ids": report_ids},
+        ).all()
+    assert jobs == [("extracted", 1), ("extracted", 1)]
@@ -0,0 +1,48 @@
+import random
+import pandas as pd
+from scraper import StockIndex, remove_noise_and_split_title
+
+
+def _full_scan(listing: pd.DataFrame, title: str) -> tuple[str, str]:
+    """StockIndex 이전의 전체 순회 (기준 구현)"""
+    in_code, in_name = '', ''
+    for code, name in listing[['Code', 'Name']].values:
+        if code in title and name in title:
+            in_code, in_name = code, name
+    return in_code, in_name
+
+
+LISTING = pd.DataFrame({
+    "Code": ["005930", "005935", "000660", "003230", "035420", "035720"],
+    "Name": ["삼성전자", "삼성전자우", "SK하이닉스", "삼양식품", "NAVER", "카카오"],
+})
+
+
+def test_last_match_wins():
+    # 코드/이름이 모두 들어 있는 종목이 여럿이면 목록상 마지막 종목
+    title = "삼성전자우(005935) 삼성전자(005930) 비교"
+    assert StockIndex(LISTING).match(title) == _full_scan(LISTING, title) == ("005935", "삼성전자우")
+
+    title = "SK하이닉스(000660), 삼성전자(005930) 메모리 업황"
+    assert StockIndex(LISTING).match(title) == _full_scan(LISTING, title) == ("000660", "SK하이닉스")
+
+
+def test_name_without_code():
+    # 종목명만 있고 코드가 없으면 매칭하지 않음
+    title = "삼성전자 4분기 실적 리뷰"
+    assert StockIndex(LISTING).match(title) == _full_scan(LISTING, title) == ("", "")
+    assert remove_noise_and_split_title(title, StockIndex(LISTING)) == [None]
+
+    # 코드만 있고 종목명이 다른 경우도 마찬가지
+    title = "반도체(005930) 업황"
+    assert StockIndex(LISTING).match(title) == _full_scan(LISTING, title) == ("", "")
+
+
+def test_matches_full_scan_on_random_titles():
+    rng = random.Random(0)
+    names = list(LISTING["Name"]) + ["실적", "목표가 상향", "(", ")", " "]
+    codes = list(LISTING["Code"]) + ["123456", "0059"]
+    index = StockIndex(LISTING)
+    for _ in range(500):
+        title = "".join(rng.choice(names + codes) for _ in range(rng.randint(1, 6)))
+        assert index.match(title) == _full_scan(LISTING, title), title
@@ -0,0 +1,39 @@
+import asyncio
+import random
+import time
+
+
+# ============================
+# 요청 속도 제한 / 재시도 대기
+# ============================
+
+class TokenBucket:
+    """
+    비동기 토큰 버킷. 평균 초당 rate개의 요청을 허용하고, 쉬고 있던 만큼 최대 burst개까지 몰아서 허용합니다.
+    여러 작업(코루틴)이 하나의 버킷을 공유하면 전체 요청 속도가 제한됩니다.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+def backoff_delay(attempt: int, base: float = 1.0, cap: float = 60.0) -> float:
+    """지수 백오프 + full jitter: 0 ~ min(cap, base * 2^attempt) 사이 임의 대기 시간(초)"""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
@@ -0,0 +1,122 @@
+import asyncio
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+# ============================
+# 단일 쓰기 큐 (single writer)
+# ============================
+# SQLite는 한 번에 하나의 쓰기 트랜잭션만 허용하므로, 프로세스 안의 모든 쓰기(리포트 적재, 주가, 리뷰, 작업 상태)를
+# 전용 스레드 하나가 순서대로 실행합니다. 대기 중인 작업은 모아서 한 트랜잭션으로 커밋해 커밋(fsync) 횟수를 줄입니다.
+# 작업은 func(session, *args) 형태이며 커밋은 하지 않습니다. (커밋/롤백은 writer가 담당)
+# 다른 프로세스(스크래퍼/파이프라인)와는 WAL + busy_timeout으로 조정됩니다. (db.py 참고)
+WRITER_MAX_BATCH = int(os.environ.get("WRITER_MAX_BATCH", 64))  # 한 트랜잭션에 묶는 최대 작업 수
+# 첫 작업 후 다른 작업을 더 기다리는 시간(초). 0이면 이미 큐에 들어와 있는 작업만 묶음
+# (쓰기가 몰릴 때는 앞 트랜잭션이 실행되는 동안 다음 작업들이 쌓이므로 기다리지 않아도 묶임)
+WRITER_LINGER = float(os.environ.get("WRITER_LINGER", 0))
+
+_STOP = object()
+
+
+class DBWriter:
+    def __init__(self, session_factory, max_batch: int = WRITER_MAX_BATCH, linger: float = WRITER_LINGER):
+        self.session_factory = session_factory
+        self.max_batch = max_batch
+        self.linger = linger
+        self._queue: queue.Queue = queue.Queue()
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    # ---------- 작업 제출 ----------
+
+    def submit(self, func, *args, **kwargs) -> Future:
+        """쓰기 작업을 큐에 넣고 Future를 반환 (커밋되면 func의 반환값, 실패하면 예외)"""
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("writer 스레드 안에서는 작업을 다시 제출할 수 없습니다")
+        self.start()
+        future = Future()
+        self._queue.put((future, func, args, kwargs))
+        return future
+
+    def write(self, func, *args, **kwargs):
+        """쓰기 작업을 실행하고 커밋될 때까지 기다림"""
+        return self.submit(func, *args, **kwargs).result()
+
+    async def write_async(self, func, *args, **kwargs):
+        """write의 async 버전 (이벤트 루프를 막지 않음)"""
+        return await asyncio.wrap_future(self.submit(func, *args, **kwargs))
+
+    # ---------- 시작/종료 ----------
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+                self._thread.start()
+
+    def stop(self, timeout: float | None = None):
+        """이미 들어온 작업을 모두 처리한 뒤 스레드를 종료"""
+        with self._lock:
+            thread = self._thread
+            if thread is None or not thread.is_alive():
+                return
+            self._queue.put(_STOP)
+        thread.join(timeout)
+
+    # ---------- writer 스레드 ----------
+
+    def _next_batch(self) -> tuple[list, bool]:
+        first = self._queue.get()
+        if first is _STOP:
+            return [], True
+        batch = [first]
+        deadline = time.monotonic() + self.linger
+        while len(batch) < self.max_batch:
+            try:
+                if self.linger > 0:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                else:
+                    item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _run(self):
+        while True:
+            batch, stop = self._next_batch()
+            batch = [job for job in batch if job[0].set_running_or_notify_cancel()]
+            if batch:
+                self._execute(batch)
+            if stop:
+                return
+
+    def _execute(self, batch: list):
+        # 1) 모아서 한 트랜잭션으로 실행
+        with self.session_factory() as session:
+            try:
+                results = [func(session, *args, **kwargs) for _, func, args, kwargs in batch]
+                session.commit()
+            except Exception:
+                session.rollback()
+                results = None
+        if results is not None:
+            for (future, *_), result in zip(batch, results):
+                future.set_result(result)
+            return
+
+        # 2) 하나라도 실패하면 작업별로 다시 실행해 실패한 작업에만 예외 전달
+        for future, func, args, kwargs in batch:
+            with self.session_factory() as session:
+                try:
+                    result = func(session, *args, **kwargs)
+                    session.commit()
+                except Exception as e:
+                    session.rollback()
+                    future.set_exception(e)
+                else:
+                    future.set_result(result)